@@ -0,0 +1,95 @@
+"""Replay a WAV file through the live audio pipeline and report utterance -> transcript latency.
+
+    python benchmarks/bench_audio_pipeline.py [--wav talk.wav] [--model-latency 0.8] [--live]
+
+Without --wav a synthetic talk (tone bursts separated by pauses) is generated.
+Audio is fed in real time (use --speed to replay faster). The transcriber is a
+stand-in that sleeps --model-latency seconds unless --live is given, in which
+case TranscriptionAgent.transcribe_bytes is used (spends quota).
+"""
+import os
+import sys
+import time
+import wave
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from lumina.audio_pipeline import LiveTranscriptionPipeline, WavEncoder
+
+
+def load_wav(path, rate):
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2: raise SystemExit("Only 16-bit PCM WAV files are supported")
+        data = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16).astype(np.float32) / 32768
+        data = data.reshape(-1, wf.getnchannels()).mean(axis=1)
+        if wf.getframerate() != rate:
+            positions = np.arange(0, len(data), wf.getframerate() / rate)
+            data = np.interp(positions, np.arange(len(data)), data).astype(np.float32)
+    return data
+
+
+def synthetic_talk(rate, seconds=60, seed=3):
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0, 0.002, int(rate * seconds)).astype(np.float32)
+    t = 0.5
+    while t < seconds - 4:
+        length = rng.uniform(1.0, 6.0)
+        n = int(length * rate)
+        start = int(t * rate)
+        tone = np.sin(2 * np.pi * rng.uniform(120, 300) * np.arange(n) / rate) * 0.1
+        audio[start:start + n] += tone * (0.6 + 0.4 * np.sin(np.arange(n) / rate * 7)).astype(np.float32)
+        t += length + rng.uniform(0.3, 1.5)
+    return audio
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--wav")
+    parser.add_argument("--rate", type=int, default=16000)
+    parser.add_argument("--block", type=float, default=0.1, help="capture block size in seconds")
+    parser.add_argument("--model-latency", type=float, default=0.8)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    audio = load_wav(args.wav, args.rate) if args.wav else synthetic_talk(args.rate)
+
+    if args.live:
+        from lumina import app
+        app.create_app()
+        transcribe = app.agent.transcribe_bytes
+    else:
+        def transcribe(wav_bytes):
+            time.sleep(args.model_latency)
+            return f"<{len(wav_bytes)} bytes>"
+
+    emitted = []
+    pipeline = LiveTranscriptionPipeline(transcribe, emitted.append, rate=args.rate, workers=args.workers)
+    block = int(args.block * args.rate)
+    start = time.monotonic()
+    for i in range(0, len(audio), block):
+        # Real-time pacing: block i is "captured" once its last sample has been spoken
+        target = start + (i + block) / args.rate / args.speed
+        delay = target - time.monotonic()
+        if delay > 0: time.sleep(delay)
+        pipeline.feed(audio[i:i + block])
+    pipeline.flush()
+    pipeline.drain(timeout=60)
+
+    lat = np.asarray(pipeline.latencies) * 1000
+    print(f"Audio: {len(audio) / args.rate:.1f}s | utterances: {len(lat)} | emitted: {len(emitted)}")
+    if len(lat):
+        print(f"End-to-end latency (speech end -> transcript): p50={np.percentile(lat, 50):.0f}ms "
+              f"p90={np.percentile(lat, 90):.0f}ms p99={np.percentile(lat, 99):.0f}ms")
+
+    encoder = WavEncoder(args.rate)
+    chunk = audio[:args.rate * 5]
+    t0 = time.perf_counter()
+    for _ in range(200): encoder.encode(chunk, 2.0)
+    print(f"In-memory WAV encode (5s utterance): {(time.perf_counter() - t0) / 200 * 1000:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
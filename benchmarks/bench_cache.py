@@ -0,0 +1,59 @@
+"""Response cache keys (lumina/response_cache.py): wrong hits, paraphrase hits and key cost.
+
+    python benchmarks/bench_cache.py [--lookups 100000]
+
+Builds cache keys for pairs of questions that share every content word but
+ask something else ("When is the launch?" vs "Where is the launch?", "Is A
+faster than B?" vs "Is B faster than A?"), against the same transcript
+context. Any pair that shares a key would get the other question's cached
+answer; the script lists them and exits 1. It also reports which chat-noise
+variants of one question still hit the same entry, and the cost of building
+a key.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from lumina.response_cache import ResponseCache
+
+CONTEXT = "[01:20] The launch moved to March because the GPU supply was late. Model A is faster than model B."
+MUST_MISS = [
+    ("When is the launch?", "Where is the launch?"),
+    ("When is the launch?", "Why is the launch?"),
+    ("Why is the launch delayed?", "Is the launch delayed?"),
+    ("Who delayed the launch?", "Why was the launch delayed?"),
+    ("Is model A faster than model B?", "Is model B faster than model A?"),
+    ("Did the launch move to March?", "Did March move to the launch?"),
+    ("How much faster is model A?", "How is model A faster?"),
+    ("Is the launch delayed?", "Is the launch not delayed?"),
+]
+SHOULD_HIT = [
+    "When is the launch?", "when is the launch", "WHEN IS THE LAUNCH??", "hey, when is the launch?",
+    "quick question: when is the launch? thanks", "When is launch?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lookups", type=int, default=100000)
+    args = parser.parse_args()
+
+    wrong = [(a, b) for a, b in MUST_MISS
+             if ResponseCache.make_key("extract", a, CONTEXT) == ResponseCache.make_key("extract", b, CONTEXT)]
+    print(f"Different questions sharing a key: {len(wrong)} of {len(MUST_MISS)} pairs")
+    for a, b in wrong: print(f"  WRONG HIT: {a!r} == {b!r}")
+
+    keys = {ResponseCache.make_key("extract", q, CONTEXT) for q in SHOULD_HIT}
+    print(f"Chat-noise variants of one question: {len(SHOULD_HIT)} -> {len(keys)} cache entr{'y' if len(keys) == 1 else 'ies'}")
+
+    t0 = time.perf_counter()
+    for n in range(args.lookups):
+        ResponseCache.make_key("extract", SHOULD_HIT[n % len(SHOULD_HIT)], CONTEXT)
+    print(f"make_key: {(time.perf_counter() - t0) / args.lookups * 1e6:.2f}us each")
+    if wrong: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Labeled replay of the local fast-path classifier in front of classify_question.
+
+    python benchmarks/bench_classifier.py [--minutes 30] [--off-topic-terms 3] [--live]
+
+Reports precision of the local decisions, how many model calls they avoid and
+the added latency. Escalated questions are charged --model-latency seconds;
+--live sends them through TranscriptionAgent instead (spends quota).
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from lumina.transcript_index import TranscriptIndex
+from lumina.question_classifier import LocalClassifier
+from benchmarks.synthetic import make_transcript, stream_chunks, QUESTIONS
+
+LABELED = [(q, "relevant") for q in QUESTIONS] + [
+    ("When does the beta start for existing customers?", "relevant"),
+    ("Is there a discount for annual billing?", "relevant"),
+    ("Does function calling work on every endpoint?", "relevant"),
+    ("Can it summarize email threads?", "relevant"),
+    ("How long are the context windows going to be?", "relevant"),
+    ("Who did the external evaluations?", "relevant"),
+    ("Will it work with Google Sheets?", "relevant"),
+    ("Is there an SDK for Rust?", "relevant"),
+    ("Can I run it on my phone offline?", "relevant"),
+    ("What's the rate limit on the free tier?", "relevant"),
+    ("asdfghjkl", "nonsense"),
+    ("qwertyuiop zxcvb", "nonsense"),
+    ("???", "nonsense"),
+    ("!!!!!!", "nonsense"),
+    ("hhhhhhhhh", "nonsense"),
+    ("dkfjgh sldkfj wpeoir", "nonsense"),
+    ("xzcvbnm,./", "nonsense"),
+    ("lol", "nonsense"),
+    ("...", "nonsense"),
+    ("gggggg hhhhh", "nonsense"),
+    ("How do I bake sourdough bread at home?", "off_topic"),
+    ("Who won the football match yesterday evening?", "off_topic"),
+    ("Best pizza toppings for a birthday party?", "off_topic"),
+    ("Any good hiking trails near Denver?", "off_topic"),
+    ("What's your favourite movie soundtrack?", "off_topic"),
+    # Other scripts: the local rules can't read them, so any local decision is a miss
+    ("Когда релиз?", "relevant"),
+    ("发布日期是什么时候？", "relevant"),
+    ("متى الإصدار؟", "relevant"),
+    ("リリースはいつですか？", "relevant"),
+    ("¿Cuándo empieza la beta?", "relevant"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=int, default=30)
+    parser.add_argument("--nonsense", type=float, default=0.6)
+    parser.add_argument("--relevant", type=float, default=0.6)
+    parser.add_argument("--off-topic-terms", type=int, default=0)
+    parser.add_argument("--model-latency", type=float, default=0.6)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    index = TranscriptIndex()
+    for chunk in stream_chunks(make_transcript(args.minutes)):
+        index.append(chunk)
+    classifier = LocalClassifier(args.nonsense, args.relevant, off_topic_min_terms=args.off_topic_terms)
+
+    agent = None
+    if args.live:
+        from lumina import app
+        app.create_app()
+        agent = app.agent
+        agent.local_classifier = LocalClassifier(min_passages=10 ** 9)  # Force the model path
+
+    decided, correct, local_t, total_t, model_t = {}, {}, [], [], []
+    for question, label in LABELED:
+        t0 = time.perf_counter()
+        guess = classifier.classify(question, index)
+        local_t.append(time.perf_counter() - t0)
+        if guess is None:
+            if agent is not None:
+                t1 = time.perf_counter()
+                agent.classify_question(question, None, index)
+                model_t.append(time.perf_counter() - t1)
+            else:
+                model_t.append(args.model_latency)
+            total_t.append(local_t[-1] + model_t[-1])
+            continue
+        total_t.append(local_t[-1])
+        decided[guess] = decided.get(guess, 0) + 1
+        correct[guess] = correct.get(guess, 0) + (guess == label)
+        if guess != label: print(f"  MISS  {guess:>9} <- {label:<9} {question!r}")
+
+    n_local = sum(decided.values())
+    print(f"Transcript: {len(index)} passages | {len(LABELED)} labeled questions")
+    for label in ("nonsense", "relevant", "off_topic"):
+        n = decided.get(label, 0)
+        precision = f"{100 * correct.get(label, 0) / n:5.1f}%" if n else "    -"
+        print(f"  local {label:<9}: {n:3d} decided, precision {precision}")
+    print(f"Local precision: {100 * sum(correct.values()) / max(n_local, 1):.1f}% | "
+          f"API calls avoided: {n_local}/{len(LABELED)} ({100 * n_local / len(LABELED):.1f}%)")
+    local_ms = np.asarray(local_t) * 1000
+    print(f"Local classifier: p50={np.percentile(local_ms, 50):.3f}ms p99={np.percentile(local_ms, 99):.3f}ms")
+    baseline = np.mean(model_t) if model_t else args.model_latency
+    print(f"Mean classification latency: {np.mean(total_t) * 1000:.1f}ms vs {baseline * 1000:.1f}ms model-only"
+          + ("" if agent is not None else " (simulated model latency)"))
+
+
+if __name__ == "__main__":
+    main()
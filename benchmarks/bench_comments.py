@@ -0,0 +1,73 @@
+"""Comment pipeline (lumina/session_comments.py): ingest cost and prompt size as a chat grows.
+
+    python benchmarks/bench_comments.py [--sizes 100,1000,10000,100000] [--rate 50]
+
+Replays a busy chat (benchmarks/synthetic.py: reactions, topic opinions,
+echoes of recent comments, planted spam) into a CommentStream at --rate
+comments per second. For each chat size, reports the cost of ingesting one
+comment, the share of planted spam dropped and of real comments wrongly
+dropped, the time to build a digest, and the comment text a prompt carries:
+the token-budgeted digest against the whole list pasted in as
+"[Comment N]: text" lines, which is what clients used to send.
+
+Also feeds non-Latin comments from different viewers: each must be accepted
+as its own entry (not dropped as empty, not merged into another); the script
+exits 1 otherwise.
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from lumina.session_comments import CommentStream
+from synthetic import make_comments
+
+NON_LATIN = ["Отличный доклад", "Скучный доклад", "Очень интересно, спасибо", "讲得太好了", "听不清楚",
+             "رائع جدا", "Πολύ καλή ομιλία", "👍 Отлично"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000,10000,100000")
+    parser.add_argument("--rate", type=float, default=50, help="comments per second")
+    parser.add_argument("--window", type=int, default=1000)
+    parser.add_argument("--tokens", type=int, default=600, help="digest budget")
+    args = parser.parse_args()
+
+    print(f"{'comments':>9} | {'ingest':>12} | {'spam caught':>11} | {'real dropped':>12} | {'digest':>16} | "
+          f"{'digest prompt':>13} | {'pasted list':>12}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        comments = make_comments(size)
+        stream = CommentStream(window=args.window)
+        timings, caught, planted, lost = [], 0, 0, 0
+        for n, (user, text, is_spam) in enumerate(comments):
+            t0 = time.perf_counter()
+            outcome = stream.add(text, user=user, now=n / args.rate)
+            timings.append(time.perf_counter() - t0)
+            dropped = outcome not in ("accepted", "echo")
+            planted += is_spam
+            caught += is_spam and dropped
+            lost += not is_spam and dropped and outcome != "duplicate"
+        digests = []
+        for _ in range(20):
+            t0 = time.perf_counter()
+            digest = stream.digest(args.tokens)
+            digests.append(time.perf_counter() - t0)
+        pasted = sum(len(f"[Comment {i + 1}]: {text}\n") for i, (_, text, _) in enumerate(comments))
+        print(f"{size:>9} | {np.mean(timings) * 1e6:>8.1f}us/c | {100 * caught / max(planted, 1):>10.1f}% | "
+              f"{100 * lost / max(size - planted, 1):>11.2f}% | {np.percentile(digests, 50) * 1000:>6.2f}ms p50 | "
+              f"{len(digest) // 4:>6} tokens | {pasted // 4:>6} tokens")
+    print("\nDigest at the largest size:\n" + digest)
+
+    stream = CommentStream()
+    wrong = [(text, outcome) for n, text in enumerate(NON_LATIN)
+             if (outcome := stream.add(text, user=f"viewer{n}")) != "accepted"]
+    print(f"\nNon-Latin comments kept as their own entry: {len(NON_LATIN) - len(wrong)} of {len(NON_LATIN)}")
+    for text, outcome in wrong: print(f"  {outcome.upper()}: {text}")
+    if wrong: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
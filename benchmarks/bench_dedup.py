@@ -0,0 +1,140 @@
+"""Busy-chat replay of question deduplication.
+
+    python benchmarks/bench_dedup.py [--questions 2000] [--threshold 0.6]
+
+Viewers draw questions from paraphrase groups with Zipf-like popularity and add
+chat noise (case, punctuation, filler, a typo). Groups include near misses
+("annual" vs "monthly" billing) and questions that share every content word
+but ask something else ("When is the launch?" vs "Where is the launch?"),
+which must stay apart, and non-Latin questions. Reports the share of
+classify + extract pipelines avoided, wrong merges, missed duplicates and the
+cost of matching one question. NEVER_MERGE pairs (different non-Latin
+questions, wordless ones like "???") are also asked in a fresh session; the
+script exits 1 if any pair shares a cluster.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from lumina.sessions import Session
+from lumina.question_clusters import QuestionDeduper
+
+GROUPS = [
+    ["When is it released?", "What's the release date?", "when does it come out", "release date?"],
+    ["What about pricing for the pro plan?", "How much does the pro plan cost?", "pro plan pricing?"],
+    ["What does the enterprise plan cost?", "enterprise pricing?"],
+    ["Does the API support streaming?", "can the api stream responses", "Is streaming supported in the API?"],
+    ["Does the API support batching?", "is there a batch api"],
+    ["How does the workspace integration work?", "how does it integrate with workspace"],
+    ["How did you reduce latency?", "what made latency lower", "how was latency reduced?"],
+    ["What safety testing was done?", "what safety tests did you run"],
+    ["What's next on the roadmap?", "what is on the roadmap next", "roadmap?"],
+    ["What hardware was it trained on?", "which hardware did you train on"],
+    ["Is there a discount for annual billing?", "annual billing discount?"],
+    ["Is there a discount for monthly billing?", "monthly billing discount?"],
+    ["Will it work with Google Sheets?", "does it work with google sheets"],
+    ["Will it work with Google Docs?", "does it work with google docs"],
+    ["Is there an SDK for Rust?", "rust sdk?"],
+    ["Is there an SDK for Go?", "go sdk available?"],
+    ["Can I run it on my phone offline?", "does it run offline on phones"],
+    ["How big is the context window?", "what is the context window size"],
+    ["Who did the external evaluations?", "who ran the external evaluations"],
+    ["What's the rate limit on the free tier?", "free tier rate limits?"],
+    # Same content words, different question: these must never share an answer
+    ["When is the launch?", "when does the launch happen"],
+    ["Where is the launch?", "where does the launch happen"],
+    ["Why is the launch delayed?", "why was the launch delayed"],
+    ["Is the launch delayed?", "was the launch delayed"],
+    ["Who trained the model?", "who trained the model"],
+    ["How was the model trained?", "how did they train the model"],
+    # Non-Latin: nothing in common with the English groups or with each other
+    ["Когда релиз?", "когда будет релиз"],
+    ["Кто спикер?", "кто сегодня спикер"],
+    ["发布日期是什么时候？"],
+    ["谁是演讲者？"],
+    ["متى الإطلاق؟"],
+]
+NEVER_MERGE = [
+    ("Когда релиз?", "Кто спикер?"),
+    ("Когда релиз?", "Где релиз?"),
+    ("发布日期是什么时候？", "谁是演讲者？"),
+    ("متى الإطلاق؟", "من المتحدث؟"),
+    ("Когда релиз?", "发布日期是什么时候？"),
+    ("???", "???"),
+    ("???", "🤔"),
+]
+FILLERS = ("", "", "hey ", "quick question: ", "guys ", "@host ")
+ENDINGS = ("", "?", "??", " please", " thanks!", "!!")
+
+
+def noisy(text, rng):
+    if rng.random() < 0.3:
+        words = text.split()
+        i = rng.randrange(len(words))
+        if len(words[i]) > 4:  # One typo: swap two inner letters
+            j = rng.randrange(1, len(words[i]) - 2)
+            w = words[i]
+            words[i] = w[:j] + w[j + 1] + w[j] + w[j + 2:]
+        text = " ".join(words)
+    text = text.lower() if rng.random() < 0.4 else text
+    return rng.choice(FILLERS) + text.rstrip("?") + rng.choice(ENDINGS)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--questions", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=0.6)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) for rank in range(len(GROUPS))]
+    order = list(range(len(GROUPS)))
+    rng.shuffle(order)  # Popularity is unrelated to how similar a group is to its near misses
+
+    session = Session("bench")
+    deduper = QuestionDeduper(args.threshold)
+    truth, timings = {}, []
+    for n in range(args.questions):
+        group = order[rng.choices(range(len(GROUPS)), weights)[0]]
+        text = noisy(rng.choice(GROUPS[group]), rng)
+        q_id = f"q{n}"
+        truth[q_id] = group
+        t0 = time.perf_counter()
+        with session.lock:
+            deduper.assign(session, q_id, text)
+        timings.append(time.perf_counter() - t0)
+
+    clusters = session.clusters
+    wrong = sum(1 for q_id, group in truth.items() if truth[clusters.leader(q_id)] != group)
+    leaders_per_group = {}
+    for leader_id in clusters.members: leaders_per_group.setdefault(truth[leader_id], []).append(leader_id)
+    stats = deduper.snapshot()
+    pipelines = len(clusters)
+    print(f"{args.questions} questions from {len(GROUPS)} groups -> {pipelines} classify+extract pipelines "
+          f"({stats['pipelines_avoided_percent']}% avoided; {stats['exact_matches']} exact, "
+          f"{stats['similar_matches']} similar matches)")
+    print(f"Wrong merges: {wrong} questions ({100 * wrong / args.questions:.2f}%) | "
+          f"extra clusters beyond one per group: {pipelines - len(leaders_per_group)}")
+    print(f"Model calls: {2 * args.questions} without dedup -> {2 * pipelines} with it (2 per pipeline)")
+    ms = np.asarray(timings) * 1000
+    print(f"Assign: p50={np.percentile(ms, 50):.3f}ms p99={np.percentile(ms, 99):.3f}ms")
+    print("Most asked:", ", ".join(f"{n}x" for _, n in clusters.popular(5)))
+
+    merged = []
+    for a, b in NEVER_MERGE:
+        pair = Session("pair")
+        with pair.lock:
+            deduper.assign(pair, "a", a)
+            if deduper.assign(pair, "b", b) == "a": merged.append((a, b))
+    print(f"Never-merge pairs merged: {len(merged)} of {len(NEVER_MERGE)}")
+    for a, b in merged: print(f"  WRONG MERGE: {a!r} + {b!r}")
+    if merged: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
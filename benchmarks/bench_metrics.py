@@ -0,0 +1,81 @@
+"""Cost of the always-on instrumentation (lumina/metrics.py).
+
+    python benchmarks/bench_metrics.py [--spans 200000] [--threads 8]
+
+Times one span (histogram observe) with trace lines off and on (to
+/dev/null), one model call record, and a /metrics render once every stage,
+endpoint and key label has data. The per-question cost (two spans, two model
+call records) is compared against building one retrieval context, the
+cheapest local step of a question.
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from lumina import metrics
+from lumina.metrics import span, record_model_call, REGISTRY
+from lumina.transcript_index import TranscriptIndex
+from synthetic import make_transcript
+
+STAGES = ("classify", "extract", "active", "recheck", "insights_map", "insights_reduce", "emit",
+          "upload_chunk", "file_upload", "file_processing", "transcription", "segment")
+
+
+def per_call_us(fn, n, threads=1):
+    def work():
+        for _ in range(n // threads): fn()
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for t in workers: t.start()
+    for t in workers: t.join()
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--spans", type=int, default=200000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--keys", type=int, default=8)
+    args = parser.parse_args()
+
+    def one_span():
+        with span("classify", session="s1", q_id="q"): pass
+
+    def one_call():
+        record_model_call("extract", 3, 0.42, 6000, {"promptTokenCount": 1500, "candidatesTokenCount": 80})
+
+    REGISTRY.configure_trace("")
+    off = per_call_us(one_span, args.spans)
+    contended = per_call_us(one_span, args.spans, args.threads)
+    call = per_call_us(one_call, args.spans)
+    REGISTRY.configure_trace(os.devnull)
+    traced = per_call_us(one_span, args.spans // 4)
+    traced_call = per_call_us(one_call, args.spans // 4)
+    REGISTRY.configure_trace("")
+    print(f"span: {off:.2f}us | {args.threads} threads: {contended:.2f}us | with trace lines: {traced:.2f}us")
+    print(f"model call record: {call:.2f}us | with trace lines: {traced_call:.2f}us")
+
+    # Every label combination populated, as on a server that has been up a while
+    for stage in STAGES: metrics.STAGE_SECONDS.observe(0.1, stage)
+    for endpoint in ("classify", "extract", "active", "insights"):
+        for key in range(1, args.keys + 1): record_model_call(endpoint, key, 0.3, 4000)
+    t0 = time.perf_counter()
+    text = REGISTRY.render()
+    render_ms = (time.perf_counter() - t0) * 1000
+    print(f"/metrics render: {render_ms:.2f}ms, {len(text.splitlines())} lines, {len(text) / 1024:.0f} KB")
+
+    index = TranscriptIndex()
+    index.append(make_transcript(60))
+    t0 = time.perf_counter()
+    for _ in range(200): index.build_context("how is pricing handled for large teams", max_tokens=2000, top_k=8)
+    context_us = (time.perf_counter() - t0) / 200 * 1e6
+    question_us = 2 * off + 2 * call
+    print(f"Per question: {question_us:.1f}us of instrumentation vs {context_us:.0f}us for one build_context "
+          f"({100 * question_us / context_us:.1f}%), before any model latency")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Prompt size and latency of extraction context: 40k-char tail slice vs. retrieval index.
+
+    python benchmarks/bench_retrieval.py [--minutes 120] [--live]
+
+--live also sends real extraction calls through TranscriptionAgent (spends quota).
+Also checks that a question about an early passage of a non-English talk
+retrieves that passage; exits 1 when it does not.
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from lumina.transcript_index import TranscriptIndex, estimate_tokens
+from benchmarks.synthetic import make_transcript, stream_chunks, QUESTIONS
+
+# (early passage, question about it): the answer scrolls out of the recent passages
+NON_LATIN = [
+    ("[00:05] Релиз новой модели перенесли на март из-за поставок видеокарт.", "Когда релиз новой модели?"),
+    ("[00:06] Η κυκλοφορία του μοντέλου μετατέθηκε για τον Μάρτιο.", "Πότε είναι η κυκλοφορία του μοντέλου;"),
+    ("[00:07] إطلاق النموذج الجديد تأجل إلى مارس.", "متى إطلاق النموذج الجديد؟"),
+]
+FILLER = "[{:02d}:{:02d}] Дальше спикер долго рассказывает про архитектуру, обучение и метрики качества. "
+
+
+def pct(samples):
+    a = np.asarray(samples) * 1000
+    return f"p50={np.percentile(a, 50):8.3f}ms  p99={np.percentile(a, 99):8.3f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=int, default=120)
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--budget", type=int, default=2000)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    transcript = make_transcript(args.minutes)
+    index = TranscriptIndex()
+    t0 = time.perf_counter()
+    for chunk in stream_chunks(transcript):
+        index.append(chunk)
+    ingest = time.perf_counter() - t0
+    print(f"Transcript: {len(transcript):,} chars, {len(index)} passages, ingest {ingest*1000:.1f}ms")
+
+    before, after, before_t, after_t = [], [], [], []
+    for _ in range(args.rounds):
+        for q in QUESTIONS:
+            t0 = time.perf_counter()
+            ctx = transcript[-40000:]
+            before_t.append(time.perf_counter() - t0)
+            before.append(estimate_tokens(ctx))
+
+            t0 = time.perf_counter()
+            ctx = index.build_context(q, max_tokens=args.budget)
+            after_t.append(time.perf_counter() - t0)
+            after.append(estimate_tokens(ctx))
+
+    print(f"Before (tail 40k): ~{int(np.mean(before)):,} tokens/prompt  context build {pct(before_t)}")
+    print(f"After  (top-k)   : ~{int(np.mean(after)):,} tokens/prompt  context build {pct(after_t)}")
+    print(f"Prompt reduction : {100 * (1 - np.mean(after) / np.mean(before)):.1f}%")
+
+    missed = []
+    for passage, question in NON_LATIN:
+        idx = TranscriptIndex()
+        idx.append(passage + " ")
+        for n in range(600): idx.append(FILLER.format(1 + n // 60, n % 60))
+        if passage not in idx.build_context(question, max_tokens=args.budget): missed.append(question)
+    print(f"Non-Latin early passages retrieved: {len(NON_LATIN) - len(missed)} of {len(NON_LATIN)}")
+    for question in missed: print(f"  MISSED: {question}")
+
+    if args.live:
+        from lumina.app import TranscriptionAgent
+        from lumina.segment_store import SegmentStore
+        agent = TranscriptionAgent()
+        store = SegmentStore()
+        for chunk in stream_chunks(transcript): store.append(chunk)
+        snapshot = store.snapshot()
+        for label, idx in (("Before", None), ("After ", index)):
+            samples = []
+            for q in QUESTIONS:
+                t0 = time.perf_counter()
+                agent.extract_answer(q, snapshot, idx)
+                samples.append(time.perf_counter() - t0)
+            print(f"{label} end-to-end extraction {pct(samples)}")
+    if missed: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Interactive latency under a background spike, with and without the work scheduler.
+
+    python benchmarks/bench_scheduler.py [--capacity 8] [--users 20] [--background 40]
+
+The model backend is simulated as --capacity concurrent calls. Viewers ask
+questions (classify + extract) at a steady rate for the whole run. Between
+--spike-start and --spike-end, --background threads of re-check batches and
+insight reports keep it busy. "shared" mode is the old setup: every call
+queues for the backend in arrival order. "scheduled" mode puts the
+WorkScheduler in front. Interactive p50/p99 is reported before and during the
+spike.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from lumina.work_scheduler import WorkScheduler, WorkDropped
+
+
+class Backend:
+    """--capacity calls at a time, granted in arrival order."""
+    def __init__(self, capacity):
+        self.free = capacity
+        self.queue = []
+        self.cond = threading.Condition()
+
+    def call(self, latency):
+        with self.cond:
+            me = object()
+            self.queue.append(me)
+            while self.queue[0] is not me or not self.free: self.cond.wait()
+            self.queue.pop(0)
+            self.free -= 1
+            self.cond.notify_all()
+        time.sleep(latency)
+        with self.cond:
+            self.free += 1
+            self.cond.notify_all()
+
+
+def run(mode, args):
+    backend = Backend(args.capacity)
+    scheduler = WorkScheduler(slots=args.capacity) if mode == "scheduled" else None
+    revision = [0]
+    stop = threading.Event()
+    start = time.perf_counter()
+    samples = []  # (start offset, latency) of interactive questions
+    background = {"done": 0, "dropped": 0}
+    lock = threading.Lock()
+
+    def call(latency, job):
+        if scheduler is None: return backend.call(latency)
+        with scheduler.slot(job): backend.call(latency)
+
+    def viewer(user):
+        rng = random.Random(user)
+        while not stop.is_set():
+            time.sleep(rng.expovariate(1 / args.think))
+            t0 = time.perf_counter()
+            job = scheduler.job("interactive", user=user, session="s0") if scheduler else None
+            call(args.classify, job)
+            call(args.extract, job)
+            with lock: samples.append((t0 - start, time.perf_counter() - t0))
+
+    def spike(n):
+        rng = random.Random(1000 + n)
+        time.sleep(args.spike_start)
+        session = f"s{n % 10}"
+        while time.perf_counter() - start < args.spike_end:
+            seen = revision[0]
+            if rng.random() < 0.7:
+                job = scheduler.job("recheck", session=session, stale=lambda: revision[0] - seen > 2) if scheduler else None
+                latency = args.extract * 2
+            else:
+                job = scheduler.job("insights", session=session, exclusive=True) if scheduler else None
+                latency = args.insights
+            try:
+                call(latency, job)
+                with lock: background["done"] += 1
+            except WorkDropped:
+                with lock: background["dropped"] += 1
+                time.sleep(0.5)
+
+    def transcript():
+        while not stop.is_set():
+            time.sleep(0.5)
+            revision[0] += 1
+
+    threads = [threading.Thread(target=viewer, args=(u,)) for u in range(args.users)]
+    threads += [threading.Thread(target=spike, args=(n,)) for n in range(args.background)]
+    threads.append(threading.Thread(target=transcript))
+    for t in threads: t.start()
+    time.sleep(args.spike_end + 3)
+    stop.set()
+    for t in threads: t.join()
+
+    def line(label, lo, hi):
+        ms = np.asarray([lat for at, lat in samples if lo <= at < hi]) * 1000
+        if not len(ms): return f"{label}: no samples"
+        return f"{label} p50 {np.percentile(ms, 50):6.0f}ms p99 {np.percentile(ms, 99):6.0f}ms"
+    print(f"{mode:>9}: interactive {line('calm', 0, args.spike_start)} | "
+          f"{line('spike', args.spike_start, args.spike_end)} | background calls done {background['done']}, "
+          f"dropped {background['dropped']}")
+    if scheduler is not None:
+        for cls, stats in scheduler.snapshot()["classes"].items():
+            print(f"{'':>11}{cls:>12}: submitted {stats['submitted']:4d} dropped {stats['dropped']:3d} "
+                  f"deadline missed {stats['deadline_missed']:3d} | wait p50 {stats['wait_ms_p50']}ms p99 {stats['wait_ms_p99']}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--think", type=float, default=2.0, help="mean seconds between a viewer's questions")
+    parser.add_argument("--background", type=int, default=40)
+    parser.add_argument("--classify", type=float, default=0.3)
+    parser.add_argument("--extract", type=float, default=0.6)
+    parser.add_argument("--insights", type=float, default=3.0)
+    parser.add_argument("--spike-start", type=float, default=5)
+    parser.add_argument("--spike-end", type=float, default=20)
+    args = parser.parse_args()
+    print(f"Backend capacity {args.capacity}, {args.users} viewers, {args.background} background workers "
+          f"from {args.spike_start:.0f}s to {args.spike_end:.0f}s")
+    for mode in ("shared", "scheduled"):
+        run(mode, args)
+
+
+if __name__ == "__main__":
+    main()
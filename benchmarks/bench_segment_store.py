@@ -0,0 +1,73 @@
+"""Memory and throughput of the transcript store vs. the old growing string.
+
+    python benchmarks/bench_segment_store.py [--hours 4]
+
+Replays a synthetic multi-hour transcript as streamed chunks. After every chunk
+each side serves the reads the server performs on that path: a 2k classify
+window and a 40k extraction window (the old code sliced the string each time).
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from lumina.segment_store import SegmentStore
+from benchmarks.synthetic import make_transcript, stream_chunks
+
+
+def run_string(chunks):
+    # Same shape as the old SESSION_STATE['transcript'] += chunk (no in-place resize for dict items)
+    state = {"transcript": ""}
+    for chunk in chunks:
+        state["transcript"] += chunk
+        state["transcript"][-2000:]
+        state["transcript"][-40000:]
+    return state
+
+
+def run_store(chunks):
+    store = SegmentStore()
+    for chunk in chunks:
+        store.append(chunk, "bench")
+        snap = store.snapshot()
+        snap.tail(2000)
+        snap.tail(40000)
+    return store
+
+
+def measure(label, fn, chunks):
+    t0 = time.perf_counter()
+    fn(chunks)
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    result = fn(chunks)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<14} {elapsed * 1000:9.1f}ms  {len(chunks) / elapsed:10,.0f} chunks/s  "
+          f"retained {current / 1e6:7.2f}MB  peak {peak / 1e6:7.2f}MB")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=float, default=4)
+    parser.add_argument("--chunk", type=int, default=120, help="chars per streamed chunk")
+    args = parser.parse_args()
+
+    text = make_transcript(int(args.hours * 60))
+    chunks = list(stream_chunks(text, args.chunk))
+    print(f"Transcript: {len(text):,} chars in {len(chunks):,} chunks ({args.hours}h)")
+    measure("string +=", run_string, chunks)
+    store = measure("SegmentStore", run_store, chunks)
+
+    snap = store.snapshot()
+    t0 = time.perf_counter()
+    for minute in range(0, int(args.hours * 60), 5):
+        snap.time_range(minute * 60, minute * 60 + 120)
+    print(f"time_range(2 min) x{int(args.hours * 12)}: {(time.perf_counter() - t0) * 1000:.2f}ms total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Persistent session store (lumina/session_store.py): write cost, restore and search at scale.
+
+    python benchmarks/bench_session_store.py [--sessions 2000] [--minutes 10]
+
+Fills a fresh database with N sessions, each a streamed synthetic transcript
+plus questions, some answered. Reports the hot-path cost of queueing a write,
+batched flush throughput, the database size, how long a cold session takes to
+restore (transcript, index and question clusters rebuilt), and full-text
+search latency across every session for common words (matching most
+passages), a prefix, a rare term and a search scoped to one session.
+Non-Latin searches must find (and highlight) a non-English session's
+passage; the script exits 1 when one does not.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from lumina.session_store import SessionStore
+from lumina.sessions import Session, SessionManager
+from synthetic import make_transcript, stream_chunks, QUESTIONS
+
+NON_LATIN_TRANSCRIPT = ("[00:05] Релиз новой модели перенесли на март. "
+                        "[00:20] Η κυκλοφορία μετατέθηκε για τον Μάρτιο. [00:40] 发布日期 推迟到三月。\n")
+NON_LATIN_SEARCHES = ["релиз", "Релиз модели", "мод", "κυκλοφορία", "发布日期"]
+
+
+def percentiles(samples):
+    ms = np.asarray(samples) * 1000
+    return f"p50={np.percentile(ms, 50):.2f}ms p99={np.percentile(ms, 99):.2f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--minutes", type=int, default=10, help="Transcript length per session")
+    parser.add_argument("--questions", type=int, default=12, help="Questions per session")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    folder = tempfile.mkdtemp(prefix="lumina-store-")
+    # Flushes are driven by hand below so each one is timed
+    store = SessionStore(os.path.join(folder, "lumina.db"), flush_interval=3600)
+
+    enqueue, flushes, rows, chars = [], [], 0, 0
+    t_fill = time.perf_counter()
+    for i in range(args.sessions):
+        session = Session(f"room{i}", store)
+        session.reset(f"video-{i}.mp4", f"{i:064x}")
+        # One rare word per session, for selective searches
+        text = make_transcript(args.minutes, seed=i) + f"[{args.minutes:02d}:00] Thanks to our sponsor codename{i}.\n"
+        for chunk in stream_chunks(text, 300):
+            t0 = time.perf_counter()
+            store.append_segment(session, chunk, session.media_id)
+            enqueue.append(time.perf_counter() - t0)
+        chars += len(text)
+        for n in range(args.questions):
+            q = {'id': f"{i}-{n}", 'user': f"viewer{n}", 'text': rng.choice(QUESTIONS), 'status': 'pending',
+                 'answer': None, 'cluster': f"{i}-{n}", 'timestamp': time.time()}
+            store.save_questions(session, [q])
+            q['status'] = 'answered' if n % 3 else 'unanswered'
+            if n % 3: q['answer'] = "The pro plan gets a discount for annual billing (Source: [01:20])."
+            store.save_questions(session, [q])
+        # Ten whole sessions per transaction; a live server flushes about a second of streaming at a time
+        if i % 10 == 9:
+            t0 = time.perf_counter()
+            rows += store.flush()
+            flushes.append(time.perf_counter() - t0)
+    session = Session("room-intl", store)
+    session.reset("intl.mp4", f"{args.sessions:064x}")
+    store.append_segment(session, NON_LATIN_TRANSCRIPT, session.media_id)
+    rows += store.flush()
+    fill = time.perf_counter() - t_fill
+    stats = store.snapshot()
+    print(f"{args.sessions} sessions, {chars / 1e6:.1f}M transcript chars, {args.sessions * args.questions} questions "
+          f"-> {stats['size_mb']} MB on disk")
+    print(f"Hot path (queue one segment): {np.mean(enqueue) * 1e6:.2f}us mean")
+    print(f"Flush: {rows} rows in {sum(flushes):.1f}s ({rows / max(sum(flushes), 1e-9):.0f} rows/s); "
+          f"per 10-room batch {percentiles(flushes)} | whole fill {fill:.1f}s")
+
+    manager = SessionManager(store=store, max_sessions=args.sessions + 1)
+    loads = []
+    for i in rng.sample(range(args.sessions), 50):
+        t0 = time.perf_counter()
+        session = manager.get_or_create(f"room{i}")
+        loads.append(time.perf_counter() - t0)
+    print(f"Cold restore ({len(session.transcript)} chars, {len(session.index)} passages, "
+          f"{len(session.questions)} questions): {percentiles(loads)}")
+
+    cases = {
+        "common word": lambda: "pricing",
+        "two words": lambda: "annual billing",
+        "prefix": lambda: "multiling",
+        "rare term": lambda: f"codename{rng.randrange(args.sessions)}",
+    }
+    for label, make in cases.items():
+        timings, hits = [], 0
+        for _ in range(args.queries):
+            t0 = time.perf_counter()
+            result = store.search(make(), limit=20)
+            timings.append(time.perf_counter() - t0)
+            hits += len(result["transcript"]) + len(result["questions"])
+        print(f"Search {label:12} {percentiles(timings)} ({hits / args.queries:.0f} hits returned)")
+    timings = []
+    for _ in range(args.queries):
+        t0 = time.perf_counter()
+        store.search("latency", limit=20, session_id=f"room{rng.randrange(args.sessions)}")
+        timings.append(time.perf_counter() - t0)
+    print(f"Search one session  {percentiles(timings)}")
+
+    missed = [q for q in NON_LATIN_SEARCHES if not any("<mark>" in t["snippet"] for t in store.search(q)["transcript"])]
+    print(f"Non-Latin searches found and highlighted: {len(NON_LATIN_SEARCHES) - len(missed)} of {len(NON_LATIN_SEARCHES)}")
+    for q in missed: print(f"  MISSED: {q}")
+    print(f"Database kept at {folder}")
+    if missed: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
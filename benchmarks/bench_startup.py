@@ -0,0 +1,141 @@
+"""Startup cost: module import, app construction and cold start to a serving server.
+
+    python benchmarks/bench_startup.py [--runs 5] [--budget 1.5] [--mode all|threading|gevent]
+
+Every run is a fresh interpreter in a scratch working directory with fake API
+keys (nothing is created in the repo and no model is called):
+
+  import     `import Lumina_Live` alone, then create_app(), timed inside the
+             child. Also lists which heavy libraries each step loaded: none of
+             the Gemini SDK, NumPy or sounddevice should load before first use.
+  cold start Lumina_Live.py from spawn until the port accepts connections,
+             until an HTTP request is answered (ready), as a deploy or
+             autoscaler sees it, and until the background prewarm has loaded
+             the deferred libraries (warm, from /metrics).
+
+--mode all (default) runs threading, and gevent when it is installed: the
+deferred imports run on a worker thread there, where some libraries fail to
+import under monkey-patching. Reports medians over --runs. Exits 1 when the
+median time to ready is over --budget seconds or a server never gets warm, so
+CI can hold the line on startup.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+from importlib.util import find_spec
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HEAVY = ("google.genai", "numpy", "sounddevice", "flask_socketio", "aiohttp")
+PROBE = f"""
+import sys, time, json
+started = time.perf_counter()
+import Lumina_Live
+imported = time.perf_counter()
+after_import = [m for m in {HEAVY!r} if m in sys.modules]
+Lumina_Live.create_app()
+built = time.perf_counter()
+print(json.dumps({{"import_s": imported - started, "create_app_s": built - imported, "after_import": after_import,
+                  "after_create_app": [m for m in {HEAVY!r} if m in sys.modules]}}))
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def scratch_env(port, mode):
+    return dict(os.environ, PYTHONPATH=ROOT, LUMINA_ASYNC_MODE=mode, LUMINA_HOST="127.0.0.1", LUMINA_PORT=str(port),
+                LUMINA_MESSAGE_QUEUE="", GEMINI_API_KEYS="bench-key-1,bench-key-2", LUMINA_CACHE_PATH="",
+                LUMINA_TRACE_LOG="")
+
+
+def probe_import(mode):
+    workdir = tempfile.mkdtemp(prefix="lumina-startup-")
+    try:
+        out = subprocess.run([sys.executable, "-c", PROBE], cwd=workdir, env=scratch_env(free_port(), mode),
+                             capture_output=True, text=True, timeout=120)
+        if out.returncode: sys.exit(f"Import failed:\n{out.stderr}")
+        return json.loads(out.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def prewarmed(port):
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+        return 'phase="prewarm"' in response.read().decode()
+
+
+def cold_start(mode, timeout=60):
+    """Seconds to port open, to the first HTTP response and to the end of the prewarm (None if it never ends)."""
+    port, workdir = free_port(), tempfile.mkdtemp(prefix="lumina-startup-")
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "Lumina_Live.py")], cwd=workdir,
+                              env=scratch_env(port, mode), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    listening = ready = warm = None
+    try:
+        deadline = started + timeout
+        while listening is None and time.perf_counter() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                listening = time.perf_counter() - started
+            except OSError:
+                if server.poll() is not None: sys.exit("Server exited during startup")
+                time.sleep(0.005)
+        while ready is None and time.perf_counter() < deadline:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/stats/sessions", timeout=5).read()
+                ready = time.perf_counter() - started
+            except OSError:
+                time.sleep(0.005)
+        while warm is None and time.perf_counter() < deadline:
+            if prewarmed(port): warm = time.perf_counter() - started
+            else: time.sleep(0.02)
+        return listening, ready, warm
+    finally:
+        server.kill()
+        server.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=1.5, help="Max median seconds from spawn to ready")
+    parser.add_argument("--mode", default="all", choices=("all", "threading", "gevent"))
+    args = parser.parse_args()
+    modes = [args.mode] if args.mode != "all" else ["threading"] + (["gevent"] if find_spec("gevent") else [])
+
+    probes = [probe_import("threading") for _ in range(args.runs)]
+    print(f"import Lumina_Live  {np.median([p['import_s'] for p in probes]) * 1000:7.0f} ms median | "
+          f"loaded: {', '.join(probes[0]['after_import']) or 'none of ' + ', '.join(HEAVY)}")
+    print(f"create_app()        {np.median([p['create_app_s'] for p in probes]) * 1000:7.0f} ms median | "
+          f"loaded: {', '.join(probes[0]['after_create_app'])}")
+
+    failed = False
+    for mode in modes:
+        starts = [cold_start(mode) for _ in range(args.runs)]
+        if any(ready is None for _, ready, _ in starts): sys.exit(f"Server ({mode}) never became ready")
+        listening = np.median([s[0] for s in starts])
+        ready = np.median([s[1] for s in starts])
+        warm = [s[2] for s in starts if s[2] is not None]
+        print(f"Cold start ({mode}): port open {listening * 1000:.0f} ms, ready {ready * 1000:.0f} ms median "
+              f"(max {max(s[1] for s in starts) * 1000:.0f} ms) | budget {args.budget * 1000:.0f} ms | "
+              + (f"warm {np.median(warm) * 1000:.0f} ms" if len(warm) == len(starts) else
+                 f"PREWARM FAILED in {len(starts) - len(warm)}/{len(starts)} runs"))
+        if ready > args.budget: print("OVER BUDGET")
+        failed |= ready > args.budget or len(warm) < len(starts)
+    if failed: sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""Offline end-to-end benchmark suite: the real Flask/Socket.IO server against a fake Gemini.
+
+    python benchmarks/bench_suite.py [--quick] [--json results.json] [--compare baseline.json]
+
+Starts benchmarks/fake_gemini.py and Lumina_Live.py as subprocesses, with
+LUMINA_MODEL_BASE_URL pointed at the fake, three fake API keys and a scratch
+working directory (uploads and stored transcripts land there, not in the repo).
+It records how long the server took to accept connections and to finish its
+background prewarm (startup), then runs four phases:
+
+  upload     resumable chunked uploads of a short file (one streamed
+             transcription) and a long one (segmented across keys). Reports
+             upload throughput, time to the first transcript chunk and time to
+             the full transcript on a viewer's socket.
+  questions  --askers clients ask for --seconds in the transcribed session.
+             Every question is distinct (deduplication is off), so each one runs
+             the classify + extract pipeline. Answers stream: first token is
+             the first answer text on the asker's socket, and a round trip
+             ends at the final answer or status.
+  active     --active clients post comments, then send Active panel queries at the same time
+             (first token and complete answer, as for questions).
+  insights   creator reports, one after another.
+
+Each phase records server RSS, and the summary adds the model call counts,
+key rotations and retries from /metrics, and the model streams the server
+cancelled early (an answer that turned out to be [NOT_FOUND]). --rate-limit makes the fake answer
+that share of calls with 429. --compare flags any metric worse than the
+baseline by more than --tolerance and exits 1, to catch regressions.
+Needs aiohttp and websocket-client; no Gemini key or quota is used.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import subprocess
+import threading
+import urllib.request
+import multiprocessing as mp
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from benchmarks.harness import Viewer
+from benchmarks.synthetic import QUESTIONS, make_comments
+
+OFF_TOPIC = ["What's the best pizza recipe in town?", "Who won the football match yesterday?",
+             "Is the weather nice over there?"]
+FINAL_STATUSES = ("unanswered", "off_topic", "nonsense")
+# Metric name suffix -> True when higher is better (everything else: lower is better)
+HIGHER_IS_BETTER = ("_per_s", "_mb_s")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def wait_warm(url, timeout=30):
+    """Wait for the server's background prewarm (lumina_startup_seconds{phase="prewarm"} in /metrics)."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        with urllib.request.urlopen(f"{url}/metrics", timeout=10) as response:
+            if 'phase="prewarm"' in response.read().decode(): return True
+        time.sleep(0.05)
+    return False
+
+
+def memory(pid):
+    """(current, peak) RSS in MB."""
+    fields = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            fields[key] = value.split()
+    return int(fields["VmRSS"][0]) / 1024, int(fields["VmHWM"][0]) / 1024
+
+
+def percentiles(seconds, prefix):
+    ms = np.asarray(seconds or [0]) * 1000
+    return {f"{prefix}_p50_ms": round(float(np.percentile(ms, 50)), 1),
+            f"{prefix}_p99_ms": round(float(np.percentile(ms, 99)), 1)}
+
+
+def http(method, url, body=None, headers=None):
+    request = urllib.request.Request(url, data=body, method=method, headers=headers or {})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.loads(response.read() or b"{}")
+
+
+def transcript_text(viewer):
+    with viewer.changed:
+        return "".join(d.get("text", "") for e, d in viewer.events if e == "new_transcript")
+
+
+# --- PHASES ---
+def run_upload(url, session, megabytes, name, chunk_mb, timeout):
+    """Chunked upload as index.js does it, then wait on a viewer for the transcript's sign-off line."""
+    viewer = Viewer(url, session)
+    data = os.urandom(int(megabytes * 1024 * 1024))  # Fresh bytes: the transcript store must not replay it
+    t0 = time.perf_counter()
+    upload_id = http("POST", f"{url}/upload/init", json.dumps({"filename": name, "size": len(data)}).encode(),
+                     {"Content-Type": "application/json"})["upload_id"]
+    step = int(chunk_mb * 1024 * 1024)
+    for offset in range(0, len(data), step):
+        http("PUT", f"{url}/upload/{upload_id}?offset={offset}&session={session}", data[offset:offset + step])
+    uploaded = time.perf_counter()
+    http("POST", f"{url}/upload/{upload_id}/complete?session_id={session}&session={session}")
+    first = viewer.wait_for(lambda e, d: e == "new_transcript" and d.get("chunk"), timeout)
+    first_at = time.perf_counter()
+    deadline = time.time() + timeout
+    while "thanks for watching" not in transcript_text(viewer) and time.time() < deadline:
+        time.sleep(0.1)
+    done_at = time.perf_counter()
+    text = transcript_text(viewer)
+    viewer.close()
+    complete = "thanks for watching" in text
+    return {
+        "upload_mb_s": round(megabytes / (uploaded - t0), 1),
+        "first_chunk_s": round(first_at - uploaded, 2) if first else None,
+        "transcript_s": round(done_at - uploaded, 2) if complete else None,
+        "transcript_chars": len(text),
+    }
+
+
+def asker_proc(url, session, texts, seconds, ready, go, results):
+    """Each thread is one viewer asking its questions back to back."""
+    latencies, first_tokens, failures, lock = [], [], [0], threading.Lock()
+
+    def loop(viewer, mine):
+        end = time.perf_counter() + seconds
+        for text in mine:
+            if time.perf_counter() >= end: break
+            t0 = time.perf_counter()
+            viewer.emit("submit_question", {"text": text, "session_id": session})
+            got = viewer.wait_for(lambda e, d: e == "question_received" and d.get("text") == text, 30)
+            q_id = got and got[1]["id"]
+            first = q_id and viewer.wait_for(lambda e, d: d.get("q_id") == q_id and (
+                e == "new_answer" or (e == "question_status_update" and d.get("status") in FINAL_STATUSES)), 30)
+            first_token = first and first[0] == "new_answer" and time.perf_counter() - t0
+            done = first and ("delta" not in first[1] or viewer.wait_for(lambda e, d: d.get("q_id") == q_id and (
+                (e == "new_answer" and "answer" in d) or (e == "question_status_update" and d.get("status") in FINAL_STATUSES)), 30))
+            with lock:
+                if first_token: first_tokens.append(first_token)
+                if done: latencies.append(time.perf_counter() - t0)
+                else: failures[0] += 1
+
+    viewers = [Viewer(url, session) for _ in texts]
+    ready.put(True)
+    go.wait()
+    threads = [threading.Thread(target=loop, args=(v, mine)) for v, mine in zip(viewers, texts)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    for v in viewers: v.close()
+    results.put((latencies, first_tokens, failures[0]))
+
+
+def question_texts(asker, count):
+    out = []
+    for n in range(count):
+        base = OFF_TOPIC[n % len(OFF_TOPIC)] if n % 5 == 4 else QUESTIONS[(asker + n) % len(QUESTIONS)]
+        out.append(f"{base.rstrip('?')} (viewer {asker} question {n})?")
+    return out
+
+
+def run_questions(url, session, askers, seconds, procs):
+    ctx = mp.get_context("spawn")
+    texts = [question_texts(a, 1000) for a in range(askers)]
+    ready, go, results = ctx.Queue(), ctx.Event(), ctx.Queue()
+    parts = [texts[i::procs] for i in range(procs) if texts[i::procs]]
+    workers = [ctx.Process(target=asker_proc, args=(url, session, part, seconds, ready, go, results)) for part in parts]
+    for p in workers: p.start()
+    for _ in workers: ready.get()
+    t0 = time.perf_counter()
+    go.set()
+    latencies, first_tokens, failures = [], [], 0
+    for _ in workers:
+        lat, first, bad = results.get()
+        latencies += lat
+        first_tokens += first
+        failures += bad
+    elapsed = time.perf_counter() - t0
+    for p in workers: p.join()
+    return dict({"round_trips_per_s": round(len(latencies) / elapsed, 1), "timeouts": failures},
+                **percentiles(latencies, "round_trip"), **percentiles(first_tokens, "first_token"))
+
+
+def run_active(url, session, clients, per_client):
+    latencies, first_tokens, lock = [], [], threading.Lock()
+
+    def loop(viewer, n):
+        for i in range(per_client):
+            query = f"{QUESTIONS[(n + i) % len(QUESTIONS)]} And how did the audience react? ({n}-{i})"
+            t0 = time.perf_counter()
+            viewer.emit("active_query", {"query": query, "session_id": session})
+            if viewer.wait_for(lambda e, d: e == "active_response" and d.get("query") == query, 60):
+                with lock: first_tokens.append(time.perf_counter() - t0)
+            if viewer.wait_for(lambda e, d: e == "active_response" and d.get("query") == query and "answer" in d, 60):
+                with lock: latencies.append(time.perf_counter() - t0)
+
+    viewers = [Viewer(url, session) for _ in range(clients)]
+    # Comments go to the server as they are posted; Active prompts carry their digest
+    for n, (_, text, _) in enumerate(make_comments(10 * clients)):
+        viewers[n % clients].emit("submit_comment", {"text": text, "session_id": session})
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=loop, args=(v, n)) for n, v in enumerate(viewers)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - t0
+    for v in viewers: v.close()
+    return dict({"queries_per_s": round(len(latencies) / elapsed, 1), "failed": clients * per_client - len(latencies)},
+                **percentiles(latencies, "latency"), **percentiles(first_tokens, "first_token"))
+
+
+def run_insights(url, session, reports):
+    viewer = Viewer(url, session)
+    latencies = []
+    for n in range(reports):
+        t0 = time.perf_counter()
+        viewer.emit("submit_comment", {"text": f"Great session {n}! The pricing part was confusing.", "session_id": session})
+        viewer.emit("generate_insights", {"session_id": session})
+        if viewer.wait_for(lambda e, d: e == "creator_insights_data", 120):
+            latencies.append(time.perf_counter() - t0)
+        with viewer.changed: viewer.events.clear()
+    viewer.close()
+    return dict({"failed": reports - len(latencies)}, **percentiles(latencies, "report"))
+
+
+def scrape(url):
+    """Totals per metric name from /metrics (labels summed)."""
+    totals = {}
+    with urllib.request.urlopen(f"{url}/metrics", timeout=10) as response:
+        for line in response.read().decode().splitlines():
+            if line.startswith("#") or not line: continue
+            name, _, value = line.rpartition(" ")
+            totals[name.split("{")[0]] = totals.get(name.split("{")[0], 0) + float(value)
+    return totals
+
+
+# --- RESULTS ---
+def compare(results, baseline, tolerance):
+    regressions = []
+    for phase, metrics in baseline.items():
+        for name, old in metrics.items():
+            new = results.get(phase, {}).get(name)
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old: continue
+            change = (new - old) / old
+            worse = -change if name.endswith(HIGHER_IS_BETTER) else change
+            if name.endswith(("_ms", "_s", "_mb", "_per_s", "_mb_s")) and worse > tolerance:
+                regressions.append(f"{phase}.{name}: {old} -> {new} ({100 * change:+.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quick", action="store_true", help="small sizes for a smoke run")
+    parser.add_argument("--mode", choices=("threading", "gevent"), default="threading")
+    parser.add_argument("--short-mb", type=float, default=4, help="short upload (single stream at 64 kbps)")
+    parser.add_argument("--long-mb", type=float, default=16, help="long upload (segmented at 64 kbps)")
+    parser.add_argument("--askers", type=int, default=40)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--procs", type=int, default=4)
+    parser.add_argument("--active", type=int, default=10)
+    parser.add_argument("--insights", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.4, help="fake model seconds per call")
+    parser.add_argument("--rate-limit", type=float, default=0.02, help="share of fake model calls answered with 429")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="baseline results file from --json")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+    if args.quick:
+        args.short_mb, args.long_mb, args.askers, args.seconds, args.active, args.insights = 1, 10, 10, 5, 4, 1
+
+    model_port, port = free_port(), free_port()
+    workdir = tempfile.mkdtemp(prefix="lumina-bench-")
+    env = dict(os.environ, LUMINA_MODEL_BASE_URL=f"http://127.0.0.1:{model_port}", LUMINA_ASYNC_MODE=args.mode,
+               LUMINA_HOST="127.0.0.1", LUMINA_PORT=str(port), LUMINA_MESSAGE_QUEUE="",
+               GEMINI_API_KEYS="bench-key-1,bench-key-2,bench-key-3", LUMINA_KEY_RPM="100000",
+               LUMINA_CACHE_PATH="", LUMINA_TRACE_LOG="", LUMINA_DEDUP_THRESHOLD="0",
+               LUMINA_INSIGHT_WINDOW_CHARS="4000")
+    fake = subprocess.Popen([sys.executable, os.path.join(ROOT, "benchmarks", "fake_gemini.py"), "--port", str(model_port),
+                             "--latency", str(args.latency), "--rate-limit", str(args.rate_limit)],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    spawned = time.perf_counter()
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "Lumina_Live.py")], cwd=workdir, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    results = {}
+    try:
+        if not wait_port(model_port) or not wait_port(port): raise RuntimeError("servers did not start")
+        ready = time.perf_counter() - spawned
+        url = f"http://127.0.0.1:{port}"
+        # Phases start once the deferred libraries are loaded, as they would be by the first real upload
+        if not wait_warm(url): raise RuntimeError("server did not finish prewarming")
+        results["startup"] = {"ready_s": round(ready, 2), "warm_s": round(time.perf_counter() - spawned, 2)}
+        idle, _ = memory(server.pid)
+        print(f"Server ({args.mode}) ready in {ready:.2f}s, warm in {results['startup']['warm_s']}s, "
+              f"{idle:.0f}MB RSS | fake model latency {args.latency}s, {100 * args.rate_limit:.0f}% 429s")
+
+        for name, mb in (("upload_short", args.short_mb), ("upload_long", args.long_mb)):
+            results[name] = run_upload(url, "bench-" + name, mb, f"{name}.webm", 8, timeout=300)
+            results[name]["rss_mb"] = round(memory(server.pid)[0], 1)
+            r = results[name]
+            print(f"{name:>13}: {mb:.0f}MB at {r['upload_mb_s']} MB/s | first chunk {r['first_chunk_s']}s | "
+                  f"full transcript {r['transcript_s']}s ({r['transcript_chars']:,} chars) | {r['rss_mb']}MB RSS")
+
+        session = "bench-upload_long"  # The longest transcript: retrieval and prompts at their largest
+        results["questions"] = run_questions(url, session, args.askers, args.seconds, args.procs)
+        results["questions"]["rss_mb"] = round(memory(server.pid)[0], 1)
+        r = results["questions"]
+        print(f"{'questions':>13}: {args.askers} askers, {r['round_trips_per_s']} round trips/s, "
+              f"p50 {r['round_trip_p50_ms']:.0f}ms p99 {r['round_trip_p99_ms']:.0f}ms ({r['timeouts']} timed out), "
+              f"first token p50 {r['first_token_p50_ms']:.0f}ms p99 {r['first_token_p99_ms']:.0f}ms | "
+              f"{r['rss_mb']}MB RSS")
+
+        results["active"] = run_active(url, session, args.active, 3)
+        results["active"]["rss_mb"] = round(memory(server.pid)[0], 1)
+        r = results["active"]
+        print(f"{'active':>13}: {args.active} clients, {r['queries_per_s']} queries/s, p50 {r['latency_p50_ms']:.0f}ms "
+              f"p99 {r['latency_p99_ms']:.0f}ms ({r['failed']} failed), first token p50 {r['first_token_p50_ms']:.0f}ms "
+              f"p99 {r['first_token_p99_ms']:.0f}ms | {r['rss_mb']}MB RSS")
+
+        results["insights"] = run_insights(url, session, args.insights)
+        rss, peak = memory(server.pid)
+        results["insights"]["rss_mb"] = round(rss, 1)
+        r = results["insights"]
+        print(f"{'insights':>13}: {args.insights} reports, p50 {r['report_p50_ms']:.0f}ms p99 {r['report_p99_ms']:.0f}ms "
+              f"({r['failed']} failed) | {r['rss_mb']}MB RSS, {peak:.0f}MB peak")
+
+        totals = scrape(url)
+        fake_stats = http("GET", f"http://127.0.0.1:{model_port}/fake/stats")
+        results["server"] = {"idle_rss_mb": round(idle, 1), "peak_rss_mb": round(peak, 1),
+                             "model_calls": int(totals.get("lumina_model_calls_total", 0)),
+                             "prompt_tokens": int(totals.get("lumina_prompt_tokens_total", 0)),
+                             "key_rotations": int(totals.get("lumina_key_rotations_total", 0)),
+                             "retries": int(totals.get("lumina_retries_total", 0)),
+                             "streams_cancelled": int(fake_stats.get("streams_cancelled", 0))}
+        r = results["server"]
+        print(f"{'server':>13}: {r['model_calls']} text model calls, {r['prompt_tokens']:,} prompt tokens, "
+              f"{r['key_rotations']} key rotations, {r['retries']} retries, "
+              f"{r['streams_cancelled']} streams cancelled early")
+    finally:
+        server.terminate()
+        fake.terminate()
+        server.wait()
+        fake.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as f: json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f: regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions: print(f"REGRESSION {line}")
+        if regressions: sys.exit(1)
+        print(f"No regressions beyond {100 * args.tolerance:.0f}% against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
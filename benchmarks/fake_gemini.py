@@ -0,0 +1,301 @@
+"""Local stand-in for the Gemini API, so Lumina can be measured without spending quota.
+
+    python benchmarks/fake_gemini.py [--port 8765] [--latency 0.4] [--rate-limit 0.02]
+    LUMINA_MODEL_BASE_URL=http://127.0.0.1:8765 python Lumina_Live.py
+
+Serves the REST calls the google-genai SDK and model_client.py make:
+generateContent, streamGenerateContent (server-sent events), the resumable file
+upload, and files get/delete. Replies follow the prompt: classifications,
+extractions grounded in the transcript text sent, batch and insights JSON, and
+transcripts built from benchmarks/synthetic.py. Each reply carries
+usageMetadata. Call latency, stream chunk size and pacing (text answers
+stream over the same --latency a generateContent call takes), file processing time, media duration (from the
+upload size) and the share of 429 responses are configurable. GET /fake/stats
+returns request counts, including streams the client hung up on.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import itertools
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(__file__))
+from synthetic import TOPICS, FILLER, fmt_ts
+
+STAMP_RE = re.compile(r"\[(\d{2}):(\d{2})\]")
+QUESTION_RE = re.compile(r'(?:USER QUESTION|QUESTION): "(.*?)"', re.S)
+TOPIC_WORDS = {name: set(re.findall(r"[a-z]+", f"{name} {fact}".lower())) - {"the", "and", "for", "with", "a"}
+               for name, fact in TOPICS}
+OFF_TOPIC = ("pizza", "weather", "football", "recipe", "movie")
+# Models rarely stop at the sentinel; the explanation after it is what an early cancel saves
+NOT_FOUND_REPLY = ("[NOT_FOUND] The transcript excerpt provided does not discuss this topic, so there is no "
+                   "grounded answer to give. The speaker may cover it later in the session.")
+
+
+def config_parser():
+    parser = argparse.ArgumentParser(description="Fake Gemini API server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.4, help="seconds per generateContent call")
+    parser.add_argument("--latency-per-kchar", type=float, default=0.002, help="extra seconds per 1000 prompt chars")
+    parser.add_argument("--first-token", type=float, default=1.0, help="seconds before the first streamed chunk")
+    parser.add_argument("--chunk-chars", type=int, default=400, help="characters per streamed chunk")
+    parser.add_argument("--chunk-interval", type=float, default=0.05, help="seconds between streamed chunks")
+    parser.add_argument("--text-first-token", type=float, default=0.15,
+                        help="seconds before a streamed text answer starts; the rest arrives by --latency")
+    parser.add_argument("--text-chunk-chars", type=int, default=16, help="characters per streamed text chunk (a few tokens)")
+    parser.add_argument("--transcribe-rate", type=float, default=0.005, help="seconds of work per media second (segments)")
+    parser.add_argument("--processing", type=float, default=1.0, help="seconds an uploaded file stays PROCESSING")
+    parser.add_argument("--kbps", type=float, default=64, help="media bitrate used to derive duration from upload size")
+    parser.add_argument("--upload-mbps", type=float, default=0, help="throttle file uploads (0 = unthrottled)")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="share of generate calls answered with 429")
+    parser.add_argument("--seed", type=int, default=1)
+    return parser
+
+
+def usage(prompt_chars, text):
+    return {"promptTokenCount": prompt_chars // 4 + 1, "candidatesTokenCount": len(text) // 4 + 1,
+            "totalTokenCount": prompt_chars // 4 + len(text) // 4 + 2}
+
+
+def candidate(text, prompt_chars):
+    return {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+            "usageMetadata": usage(prompt_chars, text)}
+
+
+def make_clip(seconds, seed, last):
+    """Transcript for `seconds` of media with [MM:SS] from 00:00; `last` ends it with a sign-off line."""
+    rng = random.Random(seed)
+    out, t = [], 0
+    while t < seconds:
+        _, fact = rng.choice(TOPICS)
+        out.append(f"{fmt_ts(t)} {' '.join(rng.sample(FILLER, 3) + [fact] + rng.sample(FILLER, 2))}\n\n")
+        t += rng.randint(15, 25)
+    if last: out.append(f"{fmt_ts(max(seconds - 5, 0))} That's all for today, thanks for watching.\n\n")
+    return "".join(out)
+
+
+def topic_of(question):
+    words = set(re.findall(r"[a-z]+", question.lower()))
+    if words & set(OFF_TOPIC): return None
+    best = max(TOPIC_WORDS, key=lambda name: len(words & TOPIC_WORDS[name]))
+    return best if words & TOPIC_WORDS[best] else None
+
+
+def grounded_answer(question, transcript):
+    """The topic's sentence and its paragraph timestamp if the transcript sent has it, else [NOT_FOUND]."""
+    name = topic_of(question)
+    if name is None: return "[NOT_FOUND]"
+    fact = dict(TOPICS)[name]
+    at = transcript.find(fact)
+    if at < 0: return "[NOT_FOUND]"
+    stamps = list(STAMP_RE.finditer(transcript, 0, at))
+    stamp = stamps[-1].group(0) if stamps else "[00:00]"
+    return f"{fact} (Source: {stamp})"
+
+
+def section(prompt, start, end):
+    i = prompt.find(start)
+    if i < 0: return ""
+    i += len(start)
+    j = prompt.find(end, i) if end else -1
+    return prompt[i:j if j >= 0 else len(prompt)]
+
+
+def text_reply(prompt):
+    """What the model would say to one of Lumina's text prompts."""
+    if "Lumina Intelligent Classifier" in prompt:
+        question = (QUESTION_RE.search(prompt) or [None, ""])[1]
+        if len(re.findall(r"[a-z]{3,}", question.lower())) < 2: return "nonsense"
+        return "relevant" if topic_of(question) else "off_topic"
+    if "Answer EACH of the user questions" in prompt:
+        transcript = section(prompt, 'TRANSCRIPT: "', None)
+        try: questions = json.loads(section(prompt, "QUESTIONS (JSON):\n", "\n\nTRANSCRIPT"))
+        except ValueError: questions = []
+        return json.dumps({"answers": [{"id": q["id"], "answer": grounded_answer(q["question"], transcript)}
+                                       for q in questions]})
+    if "Summarize ONE window" in prompt:
+        transcript = section(prompt, "TRANSCRIPT WINDOW:\n", "\n\nReturn STRICT JSON")
+        names = [name for name, fact in TOPICS if fact in transcript][:4]
+        stamp = (STAMP_RE.search(transcript) or [None])[0] or "[00:00]"
+        return json.dumps({"summary": f"From {stamp} the talk covered {', '.join(names) or 'general remarks'}.",
+                           "topics": names, "unclear_points": names[:1]})
+    if "Lumina Creator Insight Engine" in prompt:
+        topics = section(prompt, "QUESTION TOPICS (most asked first):\n", "\n\n").split(", ")[:3]
+        return json.dumps({"top_interest_topics": topics, "audience_vibe": "Curious and engaged.",
+                           "clarity_gaps": [{"topic": t, "evidence": f"What about {t}?"} for t in topics[:1]],
+                           "potential_misunderstandings": [], "delivery_improvement_suggestions": ["Recap key points."]})
+    if "Lumina AI Active" in prompt:
+        query = section(prompt, "USER QUERY:\n", None).strip()
+        answer = grounded_answer(query, section(prompt, 'TRANSCRIPT:', 'RECENT COMMENTS:'))
+        if answer == "[NOT_FOUND]": return "This information was not covered in the session."
+        return f"Based on the session: {answer}"
+    if "high-fidelity intelligence layer" in prompt:
+        question = (QUESTION_RE.search(prompt) or [None, ""])[1]
+        answer = grounded_answer(question, section(prompt, 'TRANSCRIPT: "', None))
+        return NOT_FOUND_REPLY if answer == "[NOT_FOUND]" else answer
+    return "OK."
+
+
+def field(obj, name):
+    """camelCase or snake_case key: the REST API accepts both and SDK versions differ."""
+    snake = "".join(f"_{c.lower()}" if c.isupper() else c for c in name)
+    return obj.get(name, obj.get(snake))
+
+
+def seconds(value):
+    try: return float(str(value).rstrip("s"))
+    except (TypeError, ValueError): return None
+
+
+class FakeGemini:
+    def __init__(self, config):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.files = {}        # { id: file resource dict + upload bookkeeping }
+        self.ids = itertools.count(1)
+        self.stats = Counter()
+        self.keys = Counter()  # Requests per API key
+
+    # --- MODEL CALLS ---
+    async def generate(self, request):
+        from aiohttp import web
+        model, _, method = request.match_info["call"].partition(":")
+        body = await request.json()
+        self.keys[request.headers.get("x-goog-api-key", "?")] += 1
+        if self.config.rate_limit and self.rng.random() < self.config.rate_limit:
+            self.stats["rate_limited"] += 1
+            return web.json_response({"error": {"code": 429, "status": "RESOURCE_EXHAUSTED",
+                                                "message": "Resource has been exhausted (e.g. check quota)."}},
+                                     status=429, headers={"Retry-After": "1"})
+        parts = [p for c in body.get("contents", []) for p in (c.get("parts") or [])]
+        prompt = "".join(p.get("text", "") for p in parts)
+        media = next((p for p in parts if field(p, "fileData") or field(p, "inlineData")), None)
+        if method == "streamGenerateContent":
+            self.stats["streams"] += 1
+            return await self._stream(request, prompt, media)
+        self.stats["generate"] += 1
+        if media is not None:
+            text, work = self._transcribe(prompt, media)
+        else:
+            text, work = text_reply(prompt), 0.0
+        await asyncio.sleep(self.config.latency + work + len(prompt) / 1000 * self.config.latency_per_kchar)
+        return web.json_response(candidate(text, len(prompt)))
+
+    def _transcribe(self, prompt, media):
+        """Transcript for a file (whole or one videoMetadata clip) or an inline audio chunk."""
+        if field(media, "inlineData"):
+            return "And that is the part I wanted to stress.", 0.0
+        file = self.files.get((field(field(media, "fileData"), "fileUri") or "").rsplit("/", 1)[-1])
+        duration = file["duration"] if file else 60.0
+        clip = field(media, "videoMetadata") or {}
+        start, end = seconds(field(clip, "startOffset")) or 0.0, seconds(field(clip, "endOffset")) or duration
+        self.stats["transcribed_seconds"] += int(end - start)
+        return make_clip(end - start, seed=int(start), last=end >= duration), (end - start) * self.config.transcribe_rate
+
+    async def _stream(self, request, prompt, media):
+        from aiohttp import web
+        config = self.config
+        if media is not None:
+            text, _ = self._transcribe(prompt, media)
+            first, size, interval = config.first_token, config.chunk_chars, config.chunk_interval
+        else:
+            # Same total time as generateContent, so streaming changes when text arrives, not how long a call takes
+            text, size = text_reply(prompt), max(1, config.text_chunk_chars)
+            first = min(config.text_first_token, config.latency)
+            interval = (config.latency - first) / max(1, -(-len(text) // size) - 1)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        await asyncio.sleep(first + len(prompt) / 1000 * config.latency_per_kchar)
+        size = max(1, size)
+        try:
+            for i in range(0, len(text), size):
+                if i: await asyncio.sleep(interval)
+                # Like the real API, every chunk carries the usage so far
+                chunk = dict(candidate(text[i:i + size], len(prompt)), usageMetadata=usage(len(prompt), text[:i + size]))
+                await response.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+                self.stats["stream_chars"] += len(text[i:i + size])
+            await response.write_eof()
+        except (ConnectionResetError, asyncio.CancelledError):
+            # The client stopped reading (e.g. it saw [NOT_FOUND]): the rest is never generated
+            self.stats["streams_cancelled"] += 1
+            raise
+        return response
+
+    # --- FILES ---
+    async def upload(self, request):
+        from aiohttp import web
+        upload_id = request.query.get("upload_id")
+        if upload_id is None:  # Start of a resumable upload
+            body = await request.json() if request.can_read_body else {}
+            file_id = f"f{next(self.ids)}"
+            self.files[file_id] = {
+                "resource": {"name": f"files/{file_id}", "displayName": field(body.get("file") or {}, "displayName") or file_id,
+                             "mimeType": request.headers.get("X-Goog-Upload-Header-Content-Type", "video/mp4"),
+                             "sizeBytes": request.headers.get("X-Goog-Upload-Header-Content-Length", "0"),
+                             "uri": f"{request.scheme}://{request.host}/v1beta/files/{file_id}"},
+                "received": 0, "ready_at": None, "duration": 0.0,
+            }
+            self.stats["files_created"] += 1
+            url = f"{request.scheme}://{request.host}/upload/v1beta/files?upload_id={file_id}"
+            return web.json_response({}, headers={"X-Goog-Upload-URL": url, "X-Goog-Upload-Status": "active"})
+        file = self.files.get(upload_id)
+        if file is None: return web.json_response({"error": {"code": 404, "message": "no such upload"}}, status=404)
+        data = await request.read()
+        if self.config.upload_mbps: await asyncio.sleep(len(data) * 8 / (self.config.upload_mbps * 1e6))
+        file["received"] += len(data)
+        self.stats["upload_bytes"] += len(data)
+        if "finalize" not in request.headers.get("X-Goog-Upload-Command", ""):
+            return web.json_response({}, headers={"X-Goog-Upload-Status": "active"})
+        file["ready_at"] = time.monotonic() + self.config.processing
+        file["duration"] = round(file["received"] * 8 / (self.config.kbps * 1000), 1)
+        return web.json_response({"file": self._resource(upload_id)}, headers={"X-Goog-Upload-Status": "final"})
+
+    def _resource(self, file_id):
+        file = self.files[file_id]
+        active = file["ready_at"] is not None and time.monotonic() >= file["ready_at"]
+        resource = dict(file["resource"], state="ACTIVE" if active else "PROCESSING")
+        if active: resource["videoMetadata"] = {"videoDuration": f"{file['duration']}s"}
+        return resource
+
+    async def get_file(self, request):
+        from aiohttp import web
+        file_id = request.match_info["file_id"]
+        if file_id not in self.files: return web.json_response({"error": {"code": 404, "message": "not found"}}, status=404)
+        self.stats["file_polls"] += 1
+        return web.json_response(self._resource(file_id))
+
+    async def delete_file(self, request):
+        from aiohttp import web
+        self.files.pop(request.match_info["file_id"], None)
+        self.stats["files_deleted"] += 1
+        return web.json_response({})
+
+    async def get_stats(self, request):
+        from aiohttp import web
+        return web.json_response(dict(self.stats, keys=dict(self.keys)))
+
+    def app(self):
+        from aiohttp import web
+        app = web.Application(client_max_size=1024 ** 3)
+        app.router.add_post("/v1beta/models/{call}", self.generate)
+        app.router.add_post("/upload/v1beta/files", self.upload)
+        app.router.add_get("/v1beta/files/{file_id}", self.get_file)
+        app.router.add_delete("/v1beta/files/{file_id}", self.delete_file)
+        app.router.add_get("/fake/stats", self.get_stats)
+        return app
+
+
+def serve(argv=()):
+    """Run the server in this process (also the multiprocessing entry point)."""
+    from aiohttp import web
+    config = config_parser().parse_args(list(argv))
+    web.run_app(FakeGemini(config).app(), host="127.0.0.1", port=config.port, print=None)
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1:])
@@ -0,0 +1,73 @@
+"""Real Socket.IO server and viewer clients shared by the load scripts.
+
+Viewers connect like a browser would, so room emits, frame batching and acks
+all take the production code path. The websocket transport (what browsers
+use) needs the websocket-client package; "polling" works without it.
+"""
+import time
+import socket
+import threading
+import socketio
+
+
+def start_server(port=5055):
+    """Run the app's Socket.IO server on a daemon thread. Returns (module, url)."""
+    from lumina import app as lumina
+    lumina.create_app()
+    threading.Thread(target=lumina.socketio.run, args=(lumina.app,), daemon=True, kwargs=dict(
+        host="127.0.0.1", port=port, allow_unsafe_werkzeug=True, log_output=False
+    )).start()
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return lumina, f"http://127.0.0.1:{port}"
+
+
+class Viewer:
+    """Browser stand-in: joins a session room, unpacks event-bus frames and acks them."""
+    def __init__(self, url, session_id, delay=0.0, transport="websocket"):
+        self.delay = delay  # Seconds spent per message, to simulate a slow client
+        self.events = []    # [(event, data)] after unpacking frames
+        self.messages = 0   # Socket.IO messages actually received
+        self.changed = threading.Condition()
+        self.serial = threading.Lock()  # Handlers run on their own threads; a slow client is slow in order
+        self.client = socketio.Client(reconnection=False)
+        self.client.on('*', self._on_message)
+        self.client.connect(url, transports=[transport])
+        self.client.emit('join_session', {'session_id': session_id})
+
+    def _on_message(self, event, data=None):
+        if self.delay:
+            with self.serial: time.sleep(self.delay)
+        with self.changed:
+            self.messages += 1
+            if event == 'frame':
+                self.events.extend((name, payload) for name, payload in data['events'])
+            else:
+                self.events.append((event, data))
+            self.changed.notify_all()
+        if event == 'frame' and data.get('ack'):
+            try: self.client.emit('frame_ack', {'room': data['room'], 'seq': data['seq']})
+            except socketio.exceptions.SocketIOError: pass  # Closed while a slow handler was still running
+
+    def emit(self, event, data):
+        self.client.emit(event, data)
+
+    def wait_for(self, predicate, timeout=10):
+        """Block until some received (event, data) matches predicate. Returns that pair or None."""
+        seen = 0
+        deadline = time.time() + timeout
+        with self.changed:
+            while True:
+                for name, data in self.events[seen:]:
+                    if predicate(name, data): return name, data
+                seen = len(self.events)
+                remaining = deadline - time.time()
+                if remaining <= 0 or not self.changed.wait(remaining): return None
+
+    def close(self):
+        self.client.disconnect()
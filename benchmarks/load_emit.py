@@ -0,0 +1,116 @@
+"""Fan-out load: one busy session watched by many viewers, direct emits vs. the event bus.
+
+    python benchmarks/load_emit.py [--viewers 200] [--seconds 10] [--slow 0.1]
+
+The server runs in this process and publishes transcript deltas and question
+status updates at a fixed rate; viewers run in child processes so the CPU
+figure is the server's alone. Each mode reports messages delivered per second
+and server CPU. --slow makes that share of viewers spend --slow-delay seconds
+per message, to exercise per-client backpressure.
+"""
+import os
+import sys
+import time
+import argparse
+import multiprocessing as mp
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from benchmarks.harness import start_server, Viewer
+from benchmarks.synthetic import make_transcript, stream_chunks
+
+SESSION = "fanout"
+
+
+def run_viewers(url, count, delay, transport, ready, stop, results):
+    viewers = [Viewer(url, SESSION, delay=delay, transport=transport) for _ in range(count)]
+    ready.put(count)
+    stop.wait()
+    time.sleep(1.0)  # Let in-flight frames land
+    results.put([(v.messages, len(v.events)) for v in viewers])
+    for v in viewers: v.close()
+
+
+def produce(lumina, seconds, chunk_rate, status_rate):
+    """Publish what a streaming transcription plus active Q&A would, for `seconds`."""
+    chunks = stream_chunks(make_transcript(minutes=120), 120)
+    published, next_chunk, next_status, q = 0, 0.0, 0.0, 0
+    start = time.perf_counter()
+    while (now := time.perf_counter() - start) < seconds:
+        if now >= next_chunk:
+            lumina.event_bus.publish('new_transcript', {'text': next(chunks), 'is_stream': True,
+                                                        'stream_id': SESSION, 'chunk': True}, to=SESSION)
+            published += 1
+            next_chunk += 1 / chunk_rate
+        if now >= next_status:
+            q_id = f"q{q % 20}"
+            status = ("relevant", "unanswered", "answered")[q // 20 % 3]
+            lumina.event_bus.publish('question_status_update', {'q_id': q_id, 'status': status}, to=SESSION)
+            if status == "answered":
+                lumina.event_bus.publish('new_answer', {'q_id': q_id, 'answer': "See [01:00]"}, to=SESSION)
+                published += 1
+            published += 1
+            q += 1
+            next_status += 1 / status_rate
+        time.sleep(max(min(next_chunk, next_status) - (time.perf_counter() - start), 0))
+    return published
+
+
+def run_mode(lumina, url, label, interval, args):
+    lumina.event_bus.interval = interval
+    lumina.event_bus.max_unacked, lumina.event_bus.ack_every = args.max_unacked, args.ack_every
+    ctx = mp.get_context("spawn")
+    ready, results, stop = ctx.Queue(), ctx.Queue(), ctx.Event()
+    slow = int(args.viewers * args.slow)
+    plan = [(args.viewers - slow) // args.procs + (i < (args.viewers - slow) % args.procs) for i in range(args.procs)]
+    procs = [ctx.Process(target=run_viewers, args=(url, n, 0.0, args.transport, ready, stop, results)) for n in plan if n]
+    if slow: procs.append(ctx.Process(target=run_viewers, args=(url, slow, args.slow_delay, args.transport, ready, stop, results)))
+    for p in procs: p.start()
+    for _ in procs: ready.get()
+    time.sleep(1.0)
+
+    before = lumina.event_bus.snapshot()
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    published = produce(lumina, args.seconds, args.chunk_rate, args.status_rate)
+    if interval: lumina.event_bus.flush()
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    stop.set()
+    counts = [c for _ in procs for c in results.get()]
+    for p in procs: p.join()
+    after = lumina.event_bus.snapshot()
+
+    messages = sum(m for m, _ in counts)
+    print(f"{label:>12}: {published} events published -> {messages:,} messages delivered "
+          f"({messages / wall:,.0f} msg/s) | server CPU {cpu:.2f}s ({100 * cpu / wall:.0f}% of one core, "
+          f"{1000 * cpu / published:.1f}ms per event)")
+    if interval:
+        print(f"{'':>12}  frames {after['frames'] - before['frames']}, coalesced away "
+              f"{after['events_saved'] - before['events_saved']}, skipped sends to slow clients "
+              f"{after['skipped_sends'] - before['skipped_sends']}, catch-ups {after['catch_ups'] - before['catch_ups']}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--viewers", type=int, default=200)
+    parser.add_argument("--procs", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--chunk-rate", type=float, default=20, help="transcript chunks per second")
+    parser.add_argument("--status-rate", type=float, default=10, help="question status updates per second")
+    parser.add_argument("--interval-ms", type=int, default=100)
+    parser.add_argument("--max-unacked", type=int, default=30)
+    parser.add_argument("--ack-every", type=int, default=10)
+    parser.add_argument("--slow", type=float, default=0.0, help="share of viewers that consume slowly")
+    parser.add_argument("--slow-delay", type=float, default=0.2)
+    parser.add_argument("--transport", choices=("websocket", "polling"), default="websocket")
+    parser.add_argument("--port", type=int, default=5056)
+    args = parser.parse_args()
+
+    lumina, url = start_server(args.port)
+    print(f"{args.viewers} viewers ({int(args.viewers * args.slow)} slow), {args.seconds:.0f}s, "
+          f"{args.chunk_rate:.0f} chunks/s + {args.status_rate:.0f} status updates/s")
+    # Direct first: the bus flush thread starts on the first batched publish
+    run_mode(lumina, url, "direct emit", 0, args)
+    run_mode(lumina, url, f"bus {args.interval_ms}ms", args.interval_ms / 1000, args)
+
+
+if __name__ == "__main__":
+    main()
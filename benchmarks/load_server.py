@@ -0,0 +1,200 @@
+"""Server modes side by side: werkzeug threading vs. gevent, each as its own process.
+
+    python benchmarks/load_server.py [--viewers 1000] [--sessions 50] [--askers 100] [--seconds 10]
+
+For each mode the server is started as `LUMINA_ASYNC_MODE=<mode>` in a
+subprocess, with text model calls pointed at a local fake endpoint that answers
+after --model-latency seconds. Viewers (websocket, in child processes) ramp up
+across --sessions rooms; the script reports how many connected and the
+server's threads, RSS and CPU. Askers then submit questions for --seconds:
+"local" questions are gibberish the fast-path classifier decides in-process,
+"model" questions escalate to the fake endpoint. Each round trip ends when the
+asker sees its question's status update.
+Needs websocket-client and gevent installed; GEMINI_API_KEY may be any value.
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import subprocess
+import threading
+import multiprocessing as mp
+import numpy as np
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT)
+from benchmarks.harness import Viewer
+
+
+def fake_model(port, latency):
+    """Minimal generateContent endpoint: every classification comes back off_topic."""
+    import asyncio
+    from aiohttp import web
+
+    async def generate(request):
+        await request.read()
+        await asyncio.sleep(latency)
+        return web.json_response({"candidates": [{"content": {"parts": [{"text": "off_topic"}]}}]})
+
+    app = web.Application()
+    app.router.add_post("/v1beta/models/{model}", generate)
+    web.run_app(app, host="127.0.0.1", port=port, print=None)
+
+
+def wait_port(port, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+
+def proc_stats(pid):
+    """(threads, RSS MB, CPU seconds) of a Linux process."""
+    with open(f"/proc/{pid}/status") as f:
+        status = dict(line.split(":", 1) for line in f)
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return int(status["Threads"]), int(status["VmRSS"].split()[0]) / 1024, cpu
+
+
+def viewer_proc(url, sessions, ready, stop):
+    viewers, failed = [], 0
+    for session in sessions:
+        try: viewers.append(Viewer(url, session))
+        except Exception: failed += 1
+    ready.put((len(viewers), failed))
+    stop.wait()
+    for v in viewers: v.close()
+
+
+def ask(viewer, session, text, timeout):
+    """One round trip: submit, learn the q_id from question_received, wait for its status."""
+    viewer.emit("submit_question", {"text": text, "session_id": session})
+    got = viewer.wait_for(lambda e, d: e == "question_received" and d.get("text") == text, timeout)
+    if got is None: return False
+    q_id = got[1]["id"]
+    return viewer.wait_for(lambda e, d: e == "question_status_update" and d.get("q_id") == q_id, timeout) is not None
+
+
+def asker_proc(url, sessions, kind, seconds, ready, go, results):
+    askers = [(Viewer(url, session), session) for session in sessions]
+    ready.put(len(askers))
+    go.wait()
+    latencies, failures = [], [0]
+
+    def loop(viewer, session, n):
+        deadline = time.perf_counter() + seconds
+        i = 0
+        while time.perf_counter() < deadline:
+            # Gibberish is decided locally; an unseen question on an empty room escalates to the model
+            text = f"xkcdqz{n}x{i} wvbnmp" if kind == "local" else f"What about topic {1000 + n} number {1000 + i}?"
+            t0 = time.perf_counter()
+            if ask(viewer, session, text, timeout=30): latencies.append(time.perf_counter() - t0)
+            else: failures[0] += 1
+            i += 1
+
+    threads = [threading.Thread(target=loop, args=(v, s, n)) for n, (v, s) in enumerate(askers)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    results.put((latencies, failures[0]))
+    for v, _ in askers: v.close()
+
+
+def split(items, parts):
+    return [items[i::parts] for i in range(parts) if items[i::parts]]
+
+
+def run_mode(mode, args):
+    env = dict(os.environ, LUMINA_ASYNC_MODE=mode, LUMINA_HOST="127.0.0.1", LUMINA_PORT=str(args.port),
+               LUMINA_MODEL_BASE_URL=f"http://127.0.0.1:{args.model_port}",
+               GEMINI_API_KEY=os.getenv("GEMINI_API_KEY") or "bench", LUMINA_MESSAGE_QUEUE="",
+               LUMINA_KEY_RPM="1000000", LUMINA_MAX_CONNECTIONS="1000",
+               LUMINA_DEDUP_THRESHOLD="0")  # Every asker's question is distinct; keep them from clustering
+    server = subprocess.Popen([sys.executable, "Lumina_Live.py"], cwd=ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        if not wait_port(args.port): raise RuntimeError(f"{mode} server did not start")
+        url = f"http://127.0.0.1:{args.port}"
+        threads0, rss0, _ = proc_stats(server.pid)
+        ctx = mp.get_context("spawn")
+
+        rooms = [f"room{i % args.sessions}" for i in range(args.viewers)]
+        ready, stop = ctx.Queue(), ctx.Event()
+        t0 = time.perf_counter()
+        viewers = [ctx.Process(target=viewer_proc, args=(url, part, ready, stop)) for part in split(rooms, args.procs)]
+        for p in viewers: p.start()
+        connected = failed = 0
+        for _ in viewers:
+            ok, bad = ready.get()
+            connected, failed = connected + ok, failed + bad
+        ramp = time.perf_counter() - t0
+        threads1, rss1, _ = proc_stats(server.pid)
+        print(f"{mode:>9}: idle {threads0} threads / {rss0:.0f}MB RSS | {connected}/{args.viewers} viewers "
+              f"connected in {ramp:.1f}s ({failed} failed) -> {threads1} threads / {rss1:.0f}MB RSS")
+
+        for kind in ("local", "model"):
+            # Askers get rooms of their own so fan-out to the viewers does not dominate
+            rooms = [f"ask-{kind}-{i}" for i in range(args.askers)]
+            ready, go, results = ctx.Queue(), ctx.Event(), ctx.Queue()
+            procs = [ctx.Process(target=asker_proc, args=(url, part, kind, args.seconds, ready, go, results))
+                     for part in split(rooms, args.procs)]
+            for p in procs: p.start()
+            for _ in procs: ready.get()
+            _, _, cpu0 = proc_stats(server.pid)
+            t0 = time.perf_counter()
+            go.set()
+            latencies, failures = [], 0
+            for _ in procs:
+                lat, bad = results.get()
+                latencies += lat
+                failures += bad
+            # Askers finish the round trip in flight at the deadline, so rate over the real elapsed time
+            elapsed = time.perf_counter() - t0
+            threads2, rss2, cpu1 = proc_stats(server.pid)
+            for p in procs: p.join()
+            ms = np.asarray(latencies or [0]) * 1000
+            print(f"{'':>9}  {kind:>5} questions: {len(latencies) / elapsed:,.0f} round trips/s "
+                  f"({failures} timed out), p50 {np.percentile(ms, 50):.0f}ms p99 {np.percentile(ms, 99):.0f}ms | "
+                  f"server CPU {100 * (cpu1 - cpu0) / elapsed:.0f}% of one core, {threads2} threads, {rss2:.0f}MB RSS")
+
+        stop.set()
+        deadline = time.time() + 30
+        for p in viewers:
+            p.join(timeout=max(deadline - time.time(), 0))
+            if p.is_alive(): p.terminate()  # Thousands of graceful disconnects can stall; they are not measured
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", default="threading,gevent")
+    parser.add_argument("--viewers", type=int, default=1000)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--askers", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--model-latency", type=float, default=0.5)
+    parser.add_argument("--procs", type=int, default=8)
+    parser.add_argument("--port", type=int, default=5057)
+    parser.add_argument("--model-port", type=int, default=8766)
+    args = parser.parse_args()
+
+    model = mp.get_context("spawn").Process(target=fake_model, args=(args.model_port, args.model_latency), daemon=True)
+    model.start()
+    wait_port(args.model_port)
+    print(f"{args.viewers} viewers over {args.sessions} sessions, {args.askers} askers for {args.seconds:.0f}s, "
+          f"fake model latency {args.model_latency * 1000:.0f}ms")
+    for mode in args.modes.split(","):
+        run_mode(mode.strip(), args)
+    model.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Load test: N simultaneous sessions with their own viewers, transcript streams and questions.
+
+    python benchmarks/load_sessions.py [--sessions 20] [--viewers 5] [--questions 10]
+
+Runs the real Flask/Socket.IO server in-process with polling Socket.IO clients.
+Model calls are replaced by a local stand-in (--model-latency seconds) so no
+quota is spent. Verifies that every client only receives its own session's
+events and reports question latency, throughput and session memory.
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from benchmarks.harness import start_server, Viewer
+from benchmarks.synthetic import make_transcript, stream_chunks, QUESTIONS
+
+
+def stub_agent(lumina, latency):
+    def classify(question, transcript, index=None, job=None):
+        time.sleep(latency / 2)
+        return "relevant"
+
+    def extract(question, transcript, index=None, job=None, on_delta=None):
+        time.sleep(latency)
+        context = index.build_context(question, max_tokens=300) if index is not None else ""
+        answer = f"{context[:60]} (Source: [00:00])" if context else "[NOT_FOUND]"
+        if on_delta and context: on_delta(answer)  # The whole answer as one streamed delta
+        return answer
+
+    lumina.agent.classify_question = classify
+    lumina.agent.extract_answer = extract
+    lumina.agent.extract_answers_batch = lambda qs, t, i=None, job=None: {q['id']: extract(q['text'], t, i) for q in qs}
+    lumina.agent.summarize_transcript_window = lambda text, job=None: time.sleep(latency) or {"summary": text[:80]}
+
+
+def run_session(lumina, url, n, args, latencies, errors, delivered):
+    session_id = f"load-{n}"
+    viewers, questions = args.viewers, args.questions
+    clients = [Viewer(url, session_id, transport=args.transport) for _ in range(viewers)]
+    for c in clients:
+        c.wait_for(lambda name, data: name == 'session_joined')
+    session = lumina.sessions.get(session_id)
+
+    transcript = make_transcript(minutes=20, seed=n)
+    for chunk in stream_chunks(f"[{session_id}]" + transcript, 400):
+        lumina.emit_transcript_chunk(session, chunk, session_id)
+
+    for i in range(questions):
+        asker, user = clients[i % viewers], f"{session_id}-v{i}"
+        t0 = time.perf_counter()
+        asker.emit('submit_question', {'text': QUESTIONS[i % len(QUESTIONS)], 'user': user})
+        received = asker.wait_for(lambda name, data: name == 'question_received' and data['user'] == user)
+        if received is None:
+            errors.append((session_id, "no acknowledgement"))
+            continue
+        q_id = received[1]['id']
+        done = asker.wait_for(lambda name, data: data.get('q_id') == q_id and (
+            name == 'new_answer' or data.get('status') in ('unanswered', 'off_topic', 'nonsense')))
+        if done is None: errors.append((session_id, "no answer"))
+        latencies.append(time.perf_counter() - t0)
+
+    time.sleep(0.5)  # Let the last frames land
+    for c in clients:
+        for name, data in list(c.events):
+            delivered.append(name)
+            if name == 'new_transcript':
+                if data.get('stream_id') != session_id: errors.append((session_id, name))
+            elif name == 'question_received':
+                if not data['user'].startswith(session_id + "-"): errors.append((session_id, name))
+        c.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--viewers", type=int, default=5)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--model-latency", type=float, default=0.05)
+    parser.add_argument("--transport", choices=("websocket", "polling"), default="websocket")
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    lumina, url = start_server(args.port)
+    stub_agent(lumina, args.model_latency)
+    latencies, errors, delivered = [], [], []
+    threads = [threading.Thread(target=run_session,
+                                args=(lumina, url, n, args, latencies, errors, delivered))
+               for n in range(args.sessions)]
+    t0 = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    elapsed = time.perf_counter() - t0
+
+    lat = np.asarray(latencies) * 1000
+    stats = lumina.sessions.snapshot()
+    print(f"{args.sessions} sessions x {args.viewers} viewers, {len(latencies)} questions in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.1f} q/s)")
+    print(f"Question round trip: p50={np.percentile(lat, 50):.1f}ms p99={np.percentile(lat, 99):.1f}ms")
+    print(f"Sessions held: {stats['sessions']} | est. memory {stats['memory_estimate_mb']}MB | evictions {stats['evictions']}")
+    print(f"Events delivered: {len(delivered)} | cross-session leaks: {len(errors)}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
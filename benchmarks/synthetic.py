@@ -0,0 +1,99 @@
+"""Synthetic session data shared by the benchmark scripts."""
+import random
+
+TOPICS = [
+    ("release", "The public release is planned for the second quarter, with a beta for existing customers first."),
+    ("pricing", "Pricing stays the same for the free tier, and the pro plan gets a discount for annual billing."),
+    ("api", "The API now supports streaming responses and function calling across every endpoint."),
+    ("workspace", "Workspace integration lets you draft documents and summarize email threads directly."),
+    ("latency", "We cut median latency in half by batching requests on the serving side."),
+    ("safety", "Every model goes through red teaming and external evaluations before launch."),
+    ("roadmap", "Next on the roadmap are longer context windows and better multilingual support."),
+    ("hardware", "Training ran on the new accelerator pods, which are twice as efficient as the last generation."),
+]
+
+FILLER = [
+    "So let me walk you through what that means in practice.",
+    "This is something a lot of you asked about in the last session.",
+    "I think it's worth pausing here for a second.",
+    "We'll come back to this point a little later.",
+    "Let me show you a quick example on screen.",
+    "And honestly the team worked really hard on this.",
+]
+
+QUESTIONS = [
+    "When is it released?",
+    "What about pricing for the pro plan?",
+    "Does the API support streaming?",
+    "How does the workspace integration work?",
+    "How did you reduce latency?",
+    "What safety testing was done?",
+    "What's next on the roadmap?",
+    "What hardware was it trained on?",
+]
+
+
+def fmt_ts(seconds):
+    m, s = divmod(int(seconds), 60)
+    return f"[{m:02d}:{s:02d}]"
+
+
+def make_transcript(minutes=60, seed=7):
+    """A Gemini-style transcript with a [MM:SS] paragraph roughly every 20 seconds."""
+    rng = random.Random(seed)
+    paragraphs = []
+    t = 0
+    while t < minutes * 60:
+        _, fact = rng.choice(TOPICS)
+        body = " ".join(rng.sample(FILLER, 3) + [fact] + rng.sample(FILLER, 2))
+        paragraphs.append(f"{fmt_ts(t)} {body}\n\n")
+        t += rng.randint(15, 25)
+    return "".join(paragraphs)
+
+
+def stream_chunks(text, chunk_chars=300):
+    """Split text the way generate_content_stream delivers it: arbitrary cut points."""
+    for i in range(0, len(text), chunk_chars):
+        yield text[i:i + chunk_chars]
+
+
+REACTIONS = ["Love it!", "This is great", "wow", "Thanks for explaining", "Nice demo", "So cool",
+             "I'm lost", "Too fast, slow down please", "Audio is bad on my side", "Boring part, skip ahead"]
+OPINIONS = {
+    "release": ["Can't wait for the release", "Q2 is too late for us", "The beta for customers first is a good call"],
+    "pricing": ["Pricing seems high", "The annual discount is nice", "Pro plan is too expensive for students"],
+    "api": ["Streaming in the API is huge", "Function calling finally!", "Is the API rate limit per key?"],
+    "workspace": ["Workspace integration looks useful", "Does it work with shared drives?"],
+    "latency": ["Half the latency is impressive", "Latency still feels slow in my region"],
+    "safety": ["Good to hear about external evals", "Who does the red teaming?"],
+    "roadmap": ["Longer context please!", "Multilingual support is what we need"],
+    "hardware": ["Twice as efficient, nice", "Which accelerators exactly?"],
+}
+SPAM = ["Check out my channel www.free-subs.xyz", "FREE CRYPTO at https://scam.example",
+        "aaaaaaaaaaaaaaaaaaaa", "first first first first first first"]
+
+
+def make_comments(count, seed=11, spam_share=0.05, echo_share=0.3):
+    """[(user, text, is_spam)] for a busy chat: reactions, topic opinions, echoes of recent comments, spam."""
+    rng = random.Random(seed)
+    users = [f"viewer{i}" for i in range(max(20, count // 4))]
+    out, recent = [], []
+    for _ in range(count):
+        user = rng.choice(users)
+        roll = rng.random()
+        if roll < spam_share:
+            out.append((f"spammer{rng.randrange(3)}", rng.choice(SPAM), True))
+            continue
+        if roll < spam_share + echo_share and recent:
+            text = rng.choice(recent[-20:])  # "+1": someone else says the same thing
+        elif rng.random() < 0.4:
+            text = rng.choice(REACTIONS)
+        else:
+            topic, _ = rng.choice(TOPICS)
+            text = rng.choice(OPINIONS[topic])
+        recent.append(text)
+        # Chat noise that should not make two comments different
+        text = rng.choice(("", "", "", "lol ", "ok ", "so ")) + text + rng.choice(("", "", "!", "!!", " :)"))
+        text = text.lower() if rng.random() < 0.3 else text
+        out.append((user, text, False))
+    return out
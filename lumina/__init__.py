@@ -0,0 +1,5 @@
+"""Lumina Live server: the Flask/Socket.IO app (app.py) and its components.
+
+Importing the package loads nothing else: app.py must import server_mode
+before any other module, so gevent can patch the standard library first.
+"""
@@ -0,0 +1,38 @@
+# --- STREAMED ANSWERS ---
+# Extraction answers stream to the room as the model writes them, except for
+# the [NOT_FOUND] sentinel: text that could still turn out to be the sentinel
+# is held back until it can't, so viewers never see a partial "[NOT_". Once the
+# sentinel appears the caller stops reading, which cancels the model call.
+
+NOT_FOUND = "[NOT_FOUND]"
+
+
+class SentinelGate:
+    def __init__(self, sentinel=NOT_FOUND):
+        self.sentinel = sentinel
+        self.text = ""   # Everything received
+        self.sent = 0    # How much of it has been released
+        self.found = False
+
+    def feed(self, delta):
+        """Add a delta; returns the text now safe to show ("" while undecided or once the sentinel is found)."""
+        self.text += delta
+        if self.sentinel in self.text:
+            self.found = True
+            return ""
+        # Hold back the longest tail that is the start of the sentinel
+        hold = 0
+        for n in range(min(len(self.sentinel) - 1, len(self.text)), 0, -1):
+            if self.text.endswith(self.sentinel[:n]):
+                hold = n
+                break
+        end = len(self.text) - hold
+        released = self.text[self.sent:end]
+        self.sent = max(self.sent, end)
+        return released
+
+    def flush(self):
+        """The held-back tail, once the stream ended without the sentinel."""
+        released = self.text[self.sent:]
+        self.sent = len(self.text)
+        return released
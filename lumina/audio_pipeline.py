@@ -0,0 +1,204 @@
+import time
+import struct
+import bisect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# --- LIVE AUDIO PIPELINE ---
+# capture blocks -> voice-activity segmenter -> in-memory WAV -> transcription pool
+# Speech is merged into utterances (cut on silence, not on a fixed clock), each
+# utterance starts with a short pre-roll, and forced cuts on very long speech carry
+# an overlap into the next utterance so no word is split. Transcription runs on a
+# pool while capture continues; results are emitted in utterance order.
+
+
+class WavEncoder:
+    """16-bit mono WAV encoder that reuses preallocated conversion buffers."""
+    def __init__(self, rate, max_seconds=30.0):
+        self.rate = rate
+        capacity = int(rate * max_seconds)
+        self.scratch = np.empty(capacity, dtype=np.float32)
+        self.pcm = np.empty(capacity, dtype=np.int16)
+
+    def _header(self, n):
+        data_size = n * 2
+        return struct.pack("<4sI4s4sIHHIIHH4sI",
+                           b"RIFF", 36 + data_size, b"WAVE", b"fmt ", 16, 1, 1,
+                           self.rate, self.rate * 2, 2, 16, b"data", data_size)
+
+    def encode(self, samples, gain=1.0):
+        n = len(samples)
+        if n > len(self.scratch):
+            self.scratch = np.empty(n, dtype=np.float32)
+            self.pcm = np.empty(n, dtype=np.int16)
+        scratch, pcm = self.scratch[:n], self.pcm[:n]
+        np.multiply(samples, gain, out=scratch)
+        np.clip(scratch, -1, 1, out=scratch)
+        np.multiply(scratch, 32767, out=scratch)
+        np.copyto(pcm, scratch, casting="unsafe")
+        return self._header(n) + pcm.tobytes()
+
+
+class UtteranceSegmenter:
+    """Energy-based VAD with an adaptive noise floor and hangover."""
+    def __init__(self, rate=16000, frame_ms=30, threshold=0.02, gain=2.0, start_frames=3,
+                 silence_ms=500, preroll_ms=200, overlap_ms=300, max_utterance_s=12.0):
+        self.rate = rate
+        self.frame = int(rate * frame_ms / 1000)
+        self.threshold = threshold
+        self.gain = gain
+        self.start_frames = start_frames
+        self.end_frames = max(1, silence_ms // frame_ms)
+        self.preroll = int(rate * preroll_ms / 1000)
+        self.overlap = int(rate * overlap_ms / 1000)
+        self.max_samples = int(rate * max_utterance_s)
+
+        self.buffer = np.zeros(self.max_samples + self.preroll + self.frame, dtype=np.float32)
+        self.fill = 0            # Samples held in buffer
+        self.buffer_start = 0    # Absolute sample index of buffer[0]
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.noise = threshold / 3
+        self.in_speech = False
+        self.voiced_run = 0
+        self.silent_run = 0
+        self.last_voiced = 0     # Absolute sample index just past the last voiced frame
+
+    def feed(self, block):
+        """Consume a capture block. Returns a list of finished (samples, start, end) utterances."""
+        block = np.asarray(block, dtype=np.float32).reshape(-1)
+        if self.pending.size:
+            block = np.concatenate([self.pending, block])
+        n_frames = len(block) // self.frame
+        self.pending = block[n_frames * self.frame:].copy()
+
+        done = []
+        for i in range(n_frames):
+            frame = block[i * self.frame:(i + 1) * self.frame]
+            rms = float(np.sqrt(np.mean(np.square(frame)))) * self.gain
+            voiced = rms > max(self.threshold, self.noise * 3)
+            if not voiced and not self.in_speech:
+                self.noise = 0.95 * self.noise + 0.05 * rms
+            self._push(frame)
+
+            if self.in_speech:
+                if voiced:
+                    self.silent_run = 0
+                    self.last_voiced = self.buffer_start + self.fill
+                else:
+                    self.silent_run += 1
+                if self.silent_run >= self.end_frames:
+                    # Keep a short tail so trailing consonants are not clipped
+                    end = min(self.last_voiced - self.buffer_start + self.preroll, self.fill)
+                    done.append(self._cut(end, carry=0))
+                elif self.fill >= self.max_samples:
+                    done.append(self._cut(self.fill, carry=self.overlap))
+            else:
+                self.voiced_run = self.voiced_run + 1 if voiced else 0
+                if self.voiced_run >= self.start_frames:
+                    self.in_speech = True
+                    self.silent_run = 0
+                    self.last_voiced = self.buffer_start + self.fill
+                else:
+                    self._trim_to(self.preroll + self.voiced_run * self.frame)
+        return done
+
+    def flush(self):
+        """Close any utterance still open (end of file / shutdown)."""
+        if not self.in_speech: return []
+        return [self._cut(max(self.last_voiced - self.buffer_start, 0), carry=0)]
+
+    def _push(self, frame):
+        n = len(frame)
+        self.buffer[self.fill:self.fill + n] = frame
+        self.fill += n
+
+    def _trim_to(self, keep):
+        """Outside speech only the pre-roll (plus any onset frames) is retained."""
+        if self.fill <= keep: return
+        drop = self.fill - keep
+        self.buffer[:keep] = self.buffer[drop:self.fill]
+        self.fill = keep
+        self.buffer_start += drop
+
+    def _cut(self, end, carry):
+        start = self.buffer_start
+        utterance = (self.buffer[:end].copy(), start, start + end)
+        keep_from = max(end - carry, 0) if carry else end
+        kept = self.fill - keep_from
+        self.buffer[:kept] = self.buffer[keep_from:self.fill]
+        self.fill = kept
+        self.buffer_start = start + keep_from
+        # A forced cut means speech is still going; a silence cut returns to idle
+        self.in_speech = bool(carry)
+        self.voiced_run = 0
+        self.silent_run = 0
+        return utterance
+
+
+class LiveTranscriptionPipeline:
+    def __init__(self, transcribe, on_text, rate=16000, gain=2.0, threshold=0.02, workers=2, **segmenter_options):
+        self.transcribe = transcribe   # bytes -> str | None
+        self.on_text = on_text         # called in utterance order
+        self.rate = rate
+        self.gain = gain
+        self.segmenter = UtteranceSegmenter(rate=rate, threshold=threshold, gain=gain, **segmenter_options)
+        self.encoder = WavEncoder(rate, max_seconds=self.segmenter.max_samples / rate + 1)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="live-transcribe")
+        self.lock = threading.Lock()
+        self.next_seq = 0
+        self.emit_seq = 0
+        self.results = {}
+        self.fed = 0
+        self.arrivals = ([], [])  # (block end sample, capture time), for latency accounting
+        self.latencies = []  # Seconds from end of speech to transcript emitted
+
+    def feed(self, block):
+        self.fed += len(block)
+        ends, times = self.arrivals
+        ends.append(self.fed)
+        times.append(time.monotonic())
+        if len(ends) > 1024:
+            del ends[:512], times[:512]
+        for utterance in self.segmenter.feed(block):
+            self._submit(*utterance)
+
+    def flush(self):
+        for utterance in self.segmenter.flush():
+            self._submit(*utterance)
+
+    def _submit(self, samples, start, end):
+        if not len(samples): return
+        wav = self.encoder.encode(samples, self.gain)
+        ends, times = self.arrivals
+        spoken_at = times[min(bisect.bisect_left(ends, end), len(times) - 1)]
+        with self.lock:
+            seq = self.next_seq
+            self.next_seq += 1
+        self.pool.submit(self._run, seq, wav, spoken_at)
+
+    def _run(self, seq, wav, spoken_at):
+        try:
+            text = self.transcribe(wav)
+        except Exception as e:
+            print(f"[Worker] Transcription Error: {e}")
+            text = None
+        with self.lock:
+            self.results[seq] = (text, spoken_at)
+            ready = []
+            while self.emit_seq in self.results:
+                ready.append(self.results.pop(self.emit_seq))
+                self.emit_seq += 1
+            # Emit under the lock so concurrent workers cannot reorder
+            for text, spoken_at in ready:
+                self.latencies.append(time.monotonic() - spoken_at)
+                if text: self.on_text(text)
+
+    def drain(self, timeout=None):
+        """Wait until every submitted utterance has been emitted (benchmarks / shutdown)."""
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            with self.lock:
+                if self.emit_seq >= self.next_seq: return True
+            if deadline and time.monotonic() > deadline: return False
+            time.sleep(0.01)
@@ -0,0 +1,154 @@
+import time
+import threading
+from .metrics import span
+
+# --- OUTBOUND EVENT BUS ---
+# Room events are buffered and sent as one 'frame' per room every interval
+# instead of one Socket.IO message per model chunk. Inside a frame, transcript
+# deltas for the same stream are concatenated, as are streamed answer deltas
+# for the same question, and a question's status/answer updates collapse to
+# the latest one. Every `ack_every`-th frame asks clients
+# for an ack; a client more than `max_unacked` frames behind is skipped and gets
+# one merged catch-up frame when it acks again, so a slow viewer costs memory,
+# not a message backlog.
+
+COALESCED = frozenset(("question_status_update", "new_answer"))
+
+
+class Frame:
+    """Pending events for one room (or one lagging client), coalesced as they arrive."""
+    def __init__(self):
+        self.events = []   # [[event, data]]; superseded entries become None
+        self.latest = {}   # { (event, q_id): position in events }
+        self.stream = None # Position of the open transcript delta that can still be extended
+
+    def __len__(self):
+        return sum(1 for e in self.events if e is not None)
+
+    def add(self, event, data):
+        if event == "new_transcript" and data.get("chunk") and self.stream is not None:
+            open_delta = self.events[self.stream][1]
+            if open_delta.get("stream_id") == data.get("stream_id"):
+                self.events[self.stream][1] = dict(open_delta, text=open_delta["text"] + data["text"])
+                return False
+        if event in COALESCED and "q_id" in data:
+            key = (event, data["q_id"])
+            if key in self.latest:
+                previous = self.events[self.latest[key]][1]
+                if "delta" in data and "delta" in previous and previous.get("stream_id") == data.get("stream_id"):
+                    self.events[self.latest[key]][1] = dict(previous, delta=previous["delta"] + data["delta"])
+                    return False
+                self.events[self.latest[key]] = None
+            self.latest[key] = len(self.events)
+        self.stream = len(self.events) if event == "new_transcript" and data.get("chunk") else None
+        self.events.append([event, data])
+        return True
+
+    def merge(self, other):
+        for entry in other.events:
+            if entry is not None: self.add(*entry)
+
+    def payload(self, room, seq, ack):
+        return {"room": room, "seq": seq, "ack": ack, "events": [e for e in self.events if e is not None]}
+
+
+class _Client:
+    def __init__(self, room):
+        self.room = room
+        self.sent = 0      # Seq of the last frame sent to this client
+        self.acked = 0
+        self.backlog = None  # Merged Frame while the client is lagging
+
+
+class EventBus:
+    def __init__(self, socketio, interval=0.1, max_unacked=30, ack_every=None):
+        self.socketio = socketio
+        self.interval = interval   # 0 emits every event immediately (no batching)
+        self.max_unacked = max_unacked
+        # Acks are inbound events with a handler each, so ask for them sparingly
+        self.ack_every = max(1, min(ack_every or max_unacked // 3, max_unacked))
+        self.lock = threading.Lock()
+        self.send_lock = threading.Lock()  # Keeps catch-up and regular frames in seq order per client
+        self.pending = {}  # { room: Frame }
+        self.seq = {}      # { room: last frame seq }
+        self.clients = {}  # { sid: _Client }, only clients that have acked a frame
+        self.thread = None
+        self.stats = {"events_in": 0, "events_out": 0, "frames": 0, "catch_ups": 0, "skipped_sends": 0}
+
+    def publish(self, event, data, to=None):
+        """Drop-in for socketio.emit(event, data, to=room) on room-wide events."""
+        if not self.interval:
+            self.socketio.emit(event, data, to=to)
+            return
+        with self.lock:
+            self.stats["events_in"] += 1
+            self.pending.setdefault(to, Frame()).add(event, data)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="event-bus", daemon=True)
+                self.thread.start()
+
+    def ack(self, sid, room, seq):
+        """Client confirmed frame `seq`; a caught-up lagging client gets its merged backlog."""
+        if room is None: return  # Broadcast frames are not flow-controlled
+        with self.send_lock:
+            with self.lock:
+                client = self.clients.get(sid)
+                if client is None or client.room != room:
+                    client = self.clients[sid] = _Client(room)
+                    client.sent = self.seq.get(room, 0)
+                client.acked = max(client.acked, seq)
+                # Caught up once it acked the last ack-requesting frame it was sent
+                if client.backlog is None or client.acked < client.sent - client.sent % self.ack_every: return
+                catch_up, client.backlog = client.backlog, None
+                client.sent = self.seq.get(room, 0)
+                self.stats["catch_ups"] += 1
+            self.socketio.emit('frame', catch_up.payload(room, client.sent, True), to=sid)
+
+    def forget(self, sid):
+        with self.lock:
+            self.clients.pop(sid, None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[EventBus] Flush Error: {e}")
+
+    def flush(self):
+        with self.send_lock:
+            self._flush()
+
+    def _flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            sends = []
+            for room, frame in pending.items():
+                seq = self.seq[room] = self.seq.get(room, 0) + 1
+                skip = []
+                for sid, client in self.clients.items():
+                    if client.room != room: continue
+                    if client.backlog is None and client.sent - client.acked < self.max_unacked:
+                        client.sent = seq
+                        continue
+                    # Too far behind: fold this frame into its catch-up instead of queueing another send
+                    if client.backlog is None: client.backlog = Frame()
+                    client.backlog.merge(frame)
+                    skip.append(sid)
+                self.stats["frames"] += 1
+                self.stats["events_out"] += len(frame)
+                self.stats["skipped_sends"] += len(skip)
+                sends.append((room, frame.payload(room, seq, seq % self.ack_every == 0), skip))
+        if not sends: return
+        with span("emit", frames=len(sends)):
+            for room, payload, skip in sends:
+                self.socketio.emit('frame', payload, to=room, skip_sid=skip or None)
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["tracked_clients"] = len(self.clients)
+            stats["lagging_clients"] = sum(1 for c in self.clients.values() if c.backlog is not None)
+        stats["events_saved"] = stats["events_in"] - stats["events_out"]
+        return stats
@@ -0,0 +1,139 @@
+import os
+import re
+import wave
+import json
+import struct
+import shutil
+import threading
+import subprocess
+
+# --- SEGMENTED TRANSCRIPTION HELPERS ---
+# Long media is cut into time segments (via video_metadata offsets on the uploaded
+# file, so nothing is re-encoded locally). Each segment is transcribed with
+# clip-relative [MM:SS] stamps, rebased to absolute time here, and released to
+# the transcript strictly in segment order.
+
+STAMP_RE = re.compile(r"\[(?:(\d{1,2}):)?(\d{1,3}):(\d{2})\]")
+
+
+def format_timestamp(seconds):
+    """[MM:SS] like the single-pass transcript; [H:MM:SS] past 99 minutes."""
+    seconds = int(seconds)
+    if seconds >= 100 * 60:
+        h, rem = divmod(seconds, 3600)
+        return f"[{h}:{rem // 60:02d}:{rem % 60:02d}]"
+    return f"[{seconds // 60:02d}:{seconds % 60:02d}]"
+
+
+def plan_segments(duration, segment_seconds):
+    """[(start, end)] covering the media; a short tail is folded into the last segment."""
+    bounds, start = [], 0
+    while start < duration:
+        end = start + segment_seconds
+        if duration - end < segment_seconds / 4: end = duration
+        bounds.append((start, int(end + 0.999)))
+        start = end
+    return bounds
+
+
+def rebase_timestamps(text, offset, end):
+    """Shift clip-relative stamps by `offset`. Stamps already inside [offset, end] are assumed absolute."""
+    clip_length = end - offset
+    def shift(match):
+        h, m, s = match.groups()
+        seconds = int(h or 0) * 3600 + int(m) * 60 + int(s)
+        if offset and seconds > clip_length + 5 and offset <= seconds <= end + 5:
+            return format_timestamp(seconds)
+        return format_timestamp(seconds + offset)
+    return STAMP_RE.sub(shift, text)
+
+
+# --- DURATION PROBING ---
+def probe_duration(path):
+    """Media duration in seconds, or None. ffprobe when installed, else MP4/MOV and WAV headers."""
+    if shutil.which("ffprobe"):
+        try:
+            out = subprocess.run(
+                ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", path],
+                capture_output=True, timeout=30, check=True
+            ).stdout
+            return float(json.loads(out)["format"]["duration"])
+        except Exception:
+            pass
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        if ext in (".mp4", ".m4a", ".m4v", ".mov"):
+            return _mp4_duration(path)
+        if ext == ".wav":
+            with wave.open(path, "rb") as wf: return wf.getnframes() / wf.getframerate()
+    except Exception:
+        pass
+    return None
+
+
+def gemini_duration(uploaded_file):
+    """Fallback: the File API reports videoDuration (e.g. "754.3s") once a video is ACTIVE."""
+    meta = getattr(uploaded_file, "video_metadata", None) or {}
+    value = meta.get("videoDuration") or meta.get("video_duration")
+    try: return float(str(value).rstrip("s")) if value else None
+    except ValueError: return None
+
+
+def _boxes(f, end):
+    while f.tell() + 8 <= end:
+        start = f.tell()
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - start
+        if size < header: return
+        yield kind, start + header, start + size
+        f.seek(start + size)
+
+
+def _mp4_duration(path):
+    with open(path, "rb") as f:
+        file_end = os.fstat(f.fileno()).st_size
+        for kind, body, box_end in _boxes(f, file_end):
+            if kind != b"moov": continue
+            f.seek(body)
+            for child, child_body, _ in _boxes(f, box_end):
+                if child != b"mvhd": continue
+                f.seek(child_body)
+                version = f.read(4)[0]
+                if version == 1:
+                    f.seek(16, 1)
+                    timescale, duration = struct.unpack(">IQ", f.read(12))
+                else:
+                    f.seek(8, 1)
+                    timescale, duration = struct.unpack(">II", f.read(8))
+                return duration / timescale if timescale else None
+    return None
+
+
+class OrderedSegmentEmitter:
+    """Releases finished segments in order, whatever order the workers finish in."""
+    def __init__(self, count, emit):
+        self.count = count
+        self.emit = emit
+        self.lock = threading.Lock()
+        self.results = {}
+        self.next = 0
+        self.parts = []
+
+    def complete(self, seg_no, text):
+        with self.lock:
+            self.results[seg_no] = text
+            while self.next in self.results:
+                text = self.results.pop(self.next)
+                self.next += 1
+                if text:
+                    self.parts.append(text)
+                    self.emit(text)
+
+    @property
+    def full_text(self):
+        return "".join(self.parts)
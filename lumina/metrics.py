@@ -0,0 +1,186 @@
+import os
+import json
+import time
+import bisect
+import threading
+
+# --- METRICS ---
+# In-process counters and histograms, rendered in the Prometheus text format on
+# /metrics. Recording is a dict update under one lock, cheap enough to leave on
+# in production (benchmarks/bench_metrics.py). span() times one pipeline stage;
+# with LUMINA_TRACE_LOG set ("stdout" or a file path) every span is also
+# written as one JSON line carrying its fields (session, endpoint, tokens...).
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900)
+
+
+def _labels(names, values):
+    if not names: return ""
+    pairs = (f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"'
+             for n, v in zip(names, values))
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, registry, name, help, labels=()):
+        self.registry, self.name, self.help, self.label_names = registry, name, help, tuple(labels)
+        self.values = {}  # { label values: total }
+
+    def inc(self, *labels, value=1):
+        with self.registry.lock:
+            self.values[labels] = self.values.get(labels, 0) + value
+
+    def render(self):
+        return [f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in sorted(self.values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labels=(), buckets=STAGE_BUCKETS):
+        self.registry, self.name, self.help, self.label_names = registry, name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self.values = {}  # { label values: [per-bucket counts..., +Inf count, sum] }
+
+    def observe(self, value, *labels):
+        i = bisect.bisect_left(self.buckets, value)  # First bucket with value <= bound
+        with self.registry.lock:
+            row = self.values.get(labels)
+            if row is None: row = self.values[labels] = [0] * (len(self.buckets) + 2)
+            row[i] += 1
+            row[-1] += value
+
+    def render(self):
+        lines = []
+        for k, row in sorted(self.values.items()):
+            total = 0
+            for bound, n in zip(self.buckets + ("+Inf",), row):
+                total += n
+                lines.append(f"{self.name}_bucket{_labels(self.label_names + ('le',), k + (bound,))} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, k)} {row[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, k)} {total}")
+        return lines
+
+
+class Gauge:
+    """Read on scrape from a callback returning { label values tuple: value }."""
+    kind = "gauge"
+
+    def __init__(self, name, help, labels, read):
+        self.name, self.help, self.label_names, self.read = name, help, tuple(labels), read
+
+    def render(self):
+        try: values = self.read()
+        except Exception as e:
+            print(f"[Metrics] Gauge {self.name} Error: {e}")
+            return []
+        return [f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in sorted(values.items())]
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = []
+        self.trace_lock = threading.Lock()
+        self.trace = None  # File object for JSON trace lines, or None
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(self, name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=STAGE_BUCKETS):
+        return self._add(Histogram(self, name, help, labels, buckets))
+
+    def gauge(self, name, help, labels, read):
+        return self._add(Gauge(name, help, labels, read))
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def configure_trace(self, target):
+        """"stdout", a file path, or empty to turn JSON trace lines off."""
+        import sys
+        self.trace = None if not target else sys.stdout if target == "stdout" else open(target, "a", buffering=1)
+
+    def write_trace(self, record):
+        if self.trace is None: return
+        line = json.dumps(record, default=str)
+        with self.trace_lock:
+            self.trace.write(line + "\n")
+
+    def render(self):
+        out = []
+        for metric in self.metrics:
+            # Gauge callbacks may take other locks; collect them outside ours
+            if metric.kind == "gauge": lines = metric.render()
+            else:
+                with self.lock: lines = metric.render()
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(lines)
+        return "\n".join(out) + "\n"
+
+
+REGISTRY = Registry()
+REGISTRY.configure_trace(os.getenv("LUMINA_TRACE_LOG", ""))
+
+STAGE_SECONDS = REGISTRY.histogram("lumina_stage_seconds", "Wall time per pipeline stage", ("stage",))
+STAGE_ERRORS = REGISTRY.counter("lumina_stage_errors_total", "Pipeline stages that raised", ("stage",))
+MODEL_CALLS = REGISTRY.counter("lumina_model_calls_total", "Text model calls by endpoint, API key and outcome",
+                               ("endpoint", "key", "outcome"))
+MODEL_SECONDS = REGISTRY.histogram("lumina_model_call_seconds", "Text model call latency", ("endpoint",))
+FIRST_TOKEN_SECONDS = REGISTRY.histogram("lumina_model_first_token_seconds", "Streamed model call: request to first text",
+                                         ("endpoint",))
+PROMPT_TOKENS = REGISTRY.counter("lumina_prompt_tokens_total", "Prompt tokens sent (reported by the API, else estimated)",
+                                 ("endpoint", "key"))
+OUTPUT_TOKENS = REGISTRY.counter("lumina_output_tokens_total", "Output tokens received", ("endpoint", "key"))
+PROMPT_CHARS = REGISTRY.histogram("lumina_prompt_chars", "Prompt size per call in characters", ("endpoint",),
+                                  buckets=(500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000))
+ANSWER_FIRST_TOKEN_SECONDS = REGISTRY.histogram("lumina_answer_first_token_seconds",
+                                                "Question or Active query received to its first answer text sent", ("layer",))
+KEY_ROTATIONS = REGISTRY.counter("lumina_key_rotations_total", "Switches to another API key", ("reason",))
+RETRIES = REGISTRY.counter("lumina_retries_total", "Retried operations", ("stage",))
+
+
+class span:
+    """Time a pipeline stage: `with span("extract", session=...) as trace:`.
+
+    `trace` is the fields dict; keys added inside the block go to the trace line.
+    A class rather than a generator: this runs on every question.
+    """
+    __slots__ = ("stage", "fields", "start")
+
+    def __init__(self, stage, **fields):
+        self.stage, self.fields = stage, fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self.fields
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(elapsed, self.stage)
+        if exc_type is not None: STAGE_ERRORS.inc(self.stage)
+        if REGISTRY.trace is not None:
+            REGISTRY.write_trace(dict(self.fields, ts=round(time.time(), 3), stage=self.stage,
+                                      ms=round(elapsed * 1000, 2), outcome="ok" if exc_type is None else "error"))
+        return False
+
+
+def record_model_call(endpoint, key, elapsed, prompt_chars, usage=None, outcome="ok"):
+    """Per-call accounting. `usage` is the API's usage metadata (dict) when the response had one."""
+    key = str(key)
+    MODEL_CALLS.inc(endpoint, key, outcome)
+    MODEL_SECONDS.observe(elapsed, endpoint)
+    PROMPT_CHARS.observe(prompt_chars, endpoint)
+    usage = usage or {}
+    prompt_tokens = usage.get("promptTokenCount") or prompt_chars // 4 + 1
+    output_tokens = usage.get("candidatesTokenCount") or 0
+    PROMPT_TOKENS.inc(endpoint, key, value=prompt_tokens)
+    if output_tokens: OUTPUT_TOKENS.inc(endpoint, key, value=output_tokens)
+    if REGISTRY.trace is not None:
+        REGISTRY.write_trace({"ts": round(time.time(), 3), "stage": "model_call", "endpoint": endpoint, "key": key,
+                              "ms": round(elapsed * 1000, 2), "outcome": outcome, "prompt_chars": prompt_chars,
+                              "prompt_tokens": prompt_tokens, "output_tokens": output_tokens})
@@ -0,0 +1,265 @@
+import time
+import json
+import queue
+import asyncio
+import threading
+from .metrics import record_model_call, RETRIES, KEY_ROTATIONS, FIRST_TOKEN_SECONDS
+
+try:
+    import aiohttp
+except ImportError:  # Falls back to the blocking SDK client in TranscriptionAgent
+    aiohttp = None
+
+# --- ASYNC MODEL CLIENT ---
+# One asyncio loop on a background thread serves every text generation call.
+# Connections are pooled in a single aiohttp session, each API key gets its own
+# token bucket, and each endpoint (classify / extract / active / insights) has
+# its own concurrency semaphore so a slow insights report cannot starve Q&A.
+# Requests are spread across keys up front instead of rotating only after a 429.
+# stream() reads streamGenerateContent as server-sent events; abandoning the
+# stream closes the connection, which stops the generation server-side.
+
+API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+
+DEFAULT_ENDPOINT_LIMITS = {
+    "classify": 16,
+    "extract": 16,
+    "active": 8,
+    "insights": 2,
+    "default": 8,
+}
+
+
+class ModelAPIError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status} {message}")
+        self.status = status
+
+
+class TokenBucket:
+    """Requests-per-minute limiter. Only touched from the client's event loop."""
+    def __init__(self, rpm, burst=None):
+        self.rate = rpm / 60.0
+        self.capacity = float(burst or max(1, rpm // 6))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def wait_time(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class KeySlot:
+    def __init__(self, index, key, rpm):
+        self.index = index
+        self.key = key
+        self.bucket = TokenBucket(rpm)
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.stats = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+
+class AsyncModelClient:
+    def __init__(self, api_keys, model_id, rpm_per_key=60, max_connections=64, endpoint_limits=None, timeout=120,
+                 api_base=None):
+        self.model_id = model_id
+        self.api_base = api_base or API_BASE
+        self.slots = [KeySlot(i, k, rpm_per_key) for i, k in enumerate(api_keys)]
+        self.max_connections = max_connections
+        self.endpoint_limits = dict(DEFAULT_ENDPOINT_LIMITS, **(endpoint_limits or {}))
+        self.timeout = timeout
+        self.semaphores = {}
+        self.session = None
+        self.loop = None
+        self.thread = None
+        self.start_lock = threading.Lock()
+
+    # --- LOOP MANAGEMENT ---
+    def start(self):
+        with self.start_lock:
+            if self.loop is not None: return
+            ready = threading.Event()
+
+            def run():
+                self.loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(self.loop)
+                ready.set()
+                self.loop.run_forever()
+
+            self.thread = threading.Thread(target=run, name="model-client-loop", daemon=True)
+            self.thread.start()
+            ready.wait()
+            print(f"[ModelClient] Async client ready | {len(self.slots)} key(s) | {self.max_connections} pooled connections")
+
+    def submit(self, coro):
+        """Schedule a coroutine on the client loop from any thread; returns a concurrent Future."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro):
+        """Blocking helper for the threaded Socket.IO handlers."""
+        return self.submit(coro).result()
+
+    def _semaphore(self, endpoint):
+        sem = self.semaphores.get(endpoint)
+        if sem is None:
+            limit = self.endpoint_limits.get(endpoint, self.endpoint_limits["default"])
+            sem = self.semaphores[endpoint] = asyncio.Semaphore(limit)
+        return sem
+
+    def _session(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self.session
+
+    # --- KEY SCHEDULING ---
+    async def _acquire_slot(self, exclude=()):
+        while True:
+            now = time.monotonic()
+            best, best_wait = None, None
+            for slot in self.slots:
+                if slot.index in exclude and len(exclude) < len(self.slots): continue
+                wait = max(slot.cooldown_until - now, slot.bucket.wait_time(now))
+                # Ready keys win; among them the least loaded one
+                rank = (wait, slot.in_flight)
+                if best is None or rank < best_wait:
+                    best, best_wait = slot, rank
+            if best_wait[0] <= 0:
+                best.bucket.take()
+                best.in_flight += 1
+                return best
+            await asyncio.sleep(min(best_wait[0], 1.0))
+
+    # --- REQUESTS ---
+    async def generate(self, prompt, endpoint="default", json_mode=False):
+        """Text in, text out. Retries 429s on a different key."""
+        body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        if json_mode:
+            body["generationConfig"] = {"responseMimeType": "application/json"}
+        url = f"{self.api_base}/models/{self.model_id}:generateContent"
+
+        async with self._semaphore(endpoint):
+            tried = set()
+            while True:
+                slot = await self._acquire_slot(exclude=tried)
+                tried.add(slot.index)
+                slot.stats["requests"] += 1
+                started = time.perf_counter()
+                try:
+                    async with self._session().post(url, json=body, headers={"x-goog-api-key": slot.key}) as resp:
+                        if resp.status == 429:
+                            slot.stats["rate_limited"] += 1
+                            slot.cooldown_until = time.monotonic() + self._retry_after(resp.headers)
+                            record_model_call(endpoint, slot.index + 1, time.perf_counter() - started, len(prompt), outcome="rate_limited")
+                            if len(tried) < len(self.slots):
+                                RETRIES.inc("model_call")
+                                KEY_ROTATIONS.inc("rate_limited")
+                                continue
+                            raise ModelAPIError(429, "quota exhausted on every key")
+                        if resp.status >= 400:
+                            slot.stats["errors"] += 1
+                            record_model_call(endpoint, slot.index + 1, time.perf_counter() - started, len(prompt), outcome="error")
+                            raise ModelAPIError(resp.status, await resp.text())
+                        payload = await resp.json()
+                finally:
+                    slot.in_flight -= 1
+                record_model_call(endpoint, slot.index + 1, time.perf_counter() - started, len(prompt), payload.get("usageMetadata"))
+                return self._extract_text(payload)
+
+    async def stream(self, prompt, endpoint="default"):
+        """Async generator of text deltas. Same key scheduling and 429 handling as generate()."""
+        body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        url = f"{self.api_base}/models/{self.model_id}:streamGenerateContent?alt=sse"
+
+        async with self._semaphore(endpoint):
+            tried = set()
+            while True:
+                slot = await self._acquire_slot(exclude=tried)
+                tried.add(slot.index)
+                slot.stats["requests"] += 1
+                started = time.perf_counter()
+                usage = None
+                try:
+                    async with self._session().post(url, json=body, headers={"x-goog-api-key": slot.key}) as resp:
+                        if resp.status == 429:
+                            slot.stats["rate_limited"] += 1
+                            slot.cooldown_until = time.monotonic() + self._retry_after(resp.headers)
+                            record_model_call(endpoint, slot.index + 1, time.perf_counter() - started, len(prompt), outcome="rate_limited")
+                            if len(tried) < len(self.slots):
+                                RETRIES.inc("model_call")
+                                KEY_ROTATIONS.inc("rate_limited")
+                                continue
+                            raise ModelAPIError(429, "quota exhausted on every key")
+                        if resp.status >= 400:
+                            slot.stats["errors"] += 1
+                            record_model_call(endpoint, slot.index + 1, time.perf_counter() - started, len(prompt), outcome="error")
+                            raise ModelAPIError(resp.status, await resp.text())
+                        first = True
+                        try:
+                            async for line in resp.content:
+                                if not line.startswith(b"data:"): continue
+                                payload = json.loads(line[5:])
+                                usage = payload.get("usageMetadata") or usage
+                                text = self._extract_text(payload)
+                                if not text: continue
+                                if first:
+                                    FIRST_TOKEN_SECONDS.observe(time.perf_counter() - started, endpoint)
+                                    first = False
+                                yield text
+                        except (GeneratorExit, asyncio.CancelledError):
+                            resp.close()  # Drop the connection rather than reading the rest of the generation
+                            record_model_call(endpoint, slot.index + 1, time.perf_counter() - started, len(prompt), usage,
+                                              outcome="cancelled")
+                            raise
+                finally:
+                    slot.in_flight -= 1
+                record_model_call(endpoint, slot.index + 1, time.perf_counter() - started, len(prompt), usage)
+                return
+
+    def iter_stream(self, prompt, endpoint="default"):
+        """Blocking iterator over stream() for the threaded handlers. Closing it early cancels the request."""
+        deltas = queue.Queue()
+
+        async def pump():
+            try:
+                async for text in self.stream(prompt, endpoint):
+                    deltas.put(text)
+                deltas.put(None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                deltas.put(e)
+
+        future = self.submit(pump())
+        try:
+            while True:
+                item = deltas.get()
+                if item is None: return
+                if isinstance(item, Exception): raise item
+                yield item
+        finally:
+            future.cancel()
+
+    @staticmethod
+    def _retry_after(headers):
+        try: return float(headers.get("Retry-After", "10"))
+        except ValueError: return 10.0
+
+    @staticmethod
+    def _extract_text(payload):
+        candidates = payload.get("candidates") or []
+        if not candidates: return ""
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        return "".join(p.get("text", "") for p in parts)
+
+    def snapshot(self):
+        return {
+            "keys": [dict(slot.stats, index=slot.index + 1, in_flight=slot.in_flight,
+                          cooling_down=slot.cooldown_until > time.monotonic()) for slot in self.slots],
+            "endpoints": {name: self.endpoint_limits.get(name) for name in self.endpoint_limits},
+        }
@@ -0,0 +1,87 @@
+import re
+import threading
+from .transcript_index import tokenize
+
+# --- LOCAL FAST-PATH CLASSIFIER ---
+# Sits in front of the classify_question model call. Clear cases are decided
+# locally: keyboard mash / symbol-only input is "nonsense", and a question whose
+# content words mostly occur in the transcript index is "relevant". Optionally,
+# a question sharing no content word with a long transcript is "off_topic".
+# Everything else escalates to the model, which can reason about topic context.
+# The heuristics only know Latin script: questions in any other script
+# (Cyrillic, CJK, Arabic, ...) always go to the model.
+
+WORD_RE = re.compile(r"\w+")
+CONSONANT_RUN_RE = re.compile(r"[^aeiouy\d]{6,}")
+REPEAT_RE = re.compile(r"(.)\1{3,}")
+KEYBOARD_RUNS = ("qwer", "wert", "asdf", "sdfg", "dfgh", "fghj", "ghjk", "hjkl", "zxcv", "xcvb", "uiop")
+VOWELS = frozenset("aeiouy")
+
+# Words that frame a question without saying what it is about
+QUESTION_WORDS = frozenset(tokenize("""
+about also any anyone anything could does else explain going guys know more please say said should
+talk talking tell thanks there thing things think would will which whats hows
+"""))
+
+
+def implausible_word(word):
+    """Heuristic: would this token look like a typo-free word or acronym to a reader?"""
+    if word.isdigit() or (word.isupper() and len(word) <= 6): return False
+    word = word.lower()
+    if len(word) > 20 or REPEAT_RE.search(word) or CONSONANT_RUN_RE.search(word): return True
+    if any(run in word for run in KEYBOARD_RUNS): return True
+    return len(word) > 3 and not VOWELS & set(word)
+
+
+def latin_script(text):
+    """True when every letter is Latin (ASCII, accented or extended), so the heuristics above apply."""
+    return all(c < "\u0250" for c in text if c.isalpha())
+
+
+class LocalClassifier:
+    def __init__(self, nonsense_threshold=0.6, relevant_threshold=0.6, min_passages=3,
+                 off_topic_min_terms=0, off_topic_min_passages=20):
+        self.nonsense_threshold = nonsense_threshold    # Share of implausible words
+        self.relevant_threshold = relevant_threshold    # Share of content terms found in the transcript
+        self.min_passages = min_passages
+        self.off_topic_min_terms = off_topic_min_terms  # 0 disables the local off_topic rule
+        self.off_topic_min_passages = off_topic_min_passages
+        self.lock = threading.Lock()
+        self.stats = {"nonsense": 0, "relevant": 0, "off_topic": 0, "escalated": 0, "model_errors": 0}
+
+    def classify(self, question, index=None):
+        """Return a category for clear cases, or None to escalate to the model."""
+        label = self._decide(question, index)
+        with self.lock:
+            self.stats[label or "escalated"] += 1
+        return label
+
+    def _decide(self, question, index):
+        words = WORD_RE.findall(question)
+        if not any(c.isalpha() for c in question) or not words:
+            return "nonsense"
+        if not latin_script(question): return None
+        if sum(map(implausible_word, words)) / len(words) >= self.nonsense_threshold:
+            return "nonsense"
+
+        if index is None or len(index) < self.min_passages: return None
+        terms = set(tokenize(question)) - QUESTION_WORDS
+        if not terms: return None
+        coverage = index.known_terms(terms) / len(terms)
+        if coverage >= self.relevant_threshold:
+            return "relevant"
+        if (self.off_topic_min_terms and coverage == 0 and len(terms) >= self.off_topic_min_terms
+                and len(index) >= self.off_topic_min_passages):
+            return "off_topic"
+        return None
+
+    def record_error(self):
+        with self.lock:
+            self.stats["model_errors"] += 1
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+        decided = stats["nonsense"] + stats["relevant"] + stats["off_topic"]
+        stats["calls_avoided_percent"] = round(100 * decided / max(decided + stats["escalated"], 1), 1)
+        return stats
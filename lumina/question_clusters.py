@@ -0,0 +1,157 @@
+import re
+import threading
+from .transcript_index import tokenize
+from .question_classifier import QUESTION_WORDS
+
+# --- QUESTION DEDUPLICATION ---
+# In a busy chat many viewers ask the same thing. Each new question is matched
+# against the session's earlier ones: first by normalized text (its kind and
+# content terms, sorted), then by Jaccard similarity of character trigrams of
+# those terms, which tolerates typos, word order and filler. The kind (its
+# wh-word, or yes-no) must always match: "When is the launch?" and "Where is
+# the launch?" share every content term but not an answer. A match attaches the
+# question to the earlier one (its cluster leader) instead of running
+# classify + extract again; the leader's status and answer fan out to every
+# member, and the cluster size is the question's popularity.
+
+WORD_RE = re.compile(r"\w+")
+# Chat openers that would otherwise make unrelated "quick question: ..." messages look alike
+CHAT_WORDS = frozenset(tokenize("hey hi hello host quick question questions ok okay so um lol pls"))
+FILLER = QUESTION_WORDS | CHAT_WORDS
+WH_WORDS = {"what": "what", "whats": "what", "which": "what", "when": "when", "whens": "when", "where": "where",
+            "wheres": "where", "why": "why", "whys": "why", "who": "who", "whos": "who", "whom": "who",
+            "whose": "who", "how": "how", "hows": "how"}
+YES_NO_OPENERS = frozenset("""
+is are am was were do does did can could will would should shall has have had may might must
+isnt arent wasnt werent dont doesnt didnt cant couldnt wont wouldnt shouldnt hasnt havent
+""".split())
+
+
+def question_kind(text):
+    """The question's wh-word ("when", "where", ...), "yes-no" for an auxiliary opener, else ""."""
+    words = [w for w in WORD_RE.findall(text.lower().replace("'", "")) if w not in CHAT_WORDS]
+    for word in words:
+        if word in WH_WORDS: return WH_WORDS[word]
+    return "yes-no" if words and words[0] in YES_NO_OPENERS else ""
+
+
+def question_terms(text):
+    return sorted(t for t in set(tokenize(text)) - FILLER if len(t) > 1)
+
+
+def question_grams(terms):
+    return frozenset(padded[i:i + 3] for t in terms for padded in (f" {t} ",) for i in range(len(padded) - 2))
+
+
+def question_key(text):
+    """Normalized text (exact-match key), trigram set and kind of a question.
+
+    The key is "" when the text has no words at all ("???", emoji): such
+    questions never match anything.
+    """
+    terms, kind = question_terms(text), question_kind(text)
+    if not terms: terms = WORD_RE.findall(text.lower())  # Only filler words: match on all of them
+    key = " ".join(terms)
+    return (f"{kind}: {key}" if kind and key else key), question_grams(terms), kind
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+class QuestionClusters:
+    """Per-session clusters. Not locked on its own: callers hold session.lock."""
+    def __init__(self):
+        self.members = {}   # { leader_id: [q_id, ...] } in arrival order, leader first
+        self.leaders = {}   # { q_id: leader_id } for every question seen
+        self.by_key = {}    # { normalized text: leader_id }
+        self.grams = {}     # { leader_id: trigram set }
+        self.kinds = {}     # { leader_id: question kind }, which a match must share
+        self.postings = {}  # { trigram: {leader_id} } to find candidates without a full scan
+
+    def __len__(self):
+        return len(self.members)
+
+    def find(self, key, grams, threshold, kind=""):
+        """Leader of the best matching cluster of the same kind, or None."""
+        if not key: return None
+        if key in self.by_key: return self.by_key[key]
+        if not grams or not threshold: return None
+        shared = {}
+        for gram in grams:
+            for leader_id in self.postings.get(gram, ()):
+                shared[leader_id] = shared.get(leader_id, 0) + 1
+        best, best_score = None, threshold
+        for leader_id, n in shared.items():
+            if self.kinds[leader_id] != kind: continue
+            # |A & B| / |A | B| without building the union
+            score = n / (len(grams) + len(self.grams[leader_id]) - n)
+            if score >= best_score: best, best_score = leader_id, score
+        return best
+
+    def start(self, q_id, key, grams, kind=""):
+        self.members[q_id] = [q_id]
+        self.leaders[q_id] = q_id
+        if key: self.by_key.setdefault(key, q_id)
+        self.grams[q_id] = grams
+        self.kinds[q_id] = kind
+        for gram in grams: self.postings.setdefault(gram, set()).add(q_id)
+
+    def attach(self, q_id, key, leader_id):
+        self.members[leader_id].append(q_id)
+        self.leaders[q_id] = leader_id
+        if key: self.by_key.setdefault(key, leader_id)  # The next identical variant is an exact hit
+
+    def restore(self, q_id, text, leader_id):
+        """Re-add a stored question to the cluster it was assigned when first asked."""
+        key, grams, kind = question_key(text)
+        if leader_id != q_id and leader_id in self.members: self.attach(q_id, key, leader_id)
+        else: self.start(q_id, key, grams, kind)
+
+    def leader(self, q_id):
+        return self.leaders.get(q_id, q_id)
+
+    def cluster(self, q_id):
+        """Every question id sharing q_id's cluster, leader first."""
+        return list(self.members.get(self.leader(q_id), [q_id]))
+
+    def count(self, q_id):
+        return len(self.members.get(self.leader(q_id), ())) or 1
+
+    def popular(self, limit=10):
+        """[(leader_id, count)] most asked first."""
+        ranked = sorted(self.members.items(), key=lambda item: len(item[1]), reverse=True)
+        return [(leader_id, len(ids)) for leader_id, ids in ranked[:limit]]
+
+
+class QuestionDeduper:
+    def __init__(self, threshold=0.6):
+        self.threshold = threshold  # Trigram Jaccard needed to attach; 0 keeps exact (normalized) matches only
+        self.lock = threading.Lock()
+        self.stats = {"questions": 0, "exact_matches": 0, "similar_matches": 0}
+
+    def assign(self, session, q_id, text):
+        """Cluster a new question. Returns its leader id (q_id itself if it starts a new cluster).
+
+        Call with session.lock held, so the leader's status cannot change
+        between the match and the caller copying it.
+        """
+        clusters = session.clusters
+        key, grams, kind = question_key(text)
+        exact = key in clusters.by_key
+        leader_id = clusters.find(key, grams, self.threshold, kind)
+        if leader_id is None:
+            clusters.start(q_id, key, grams, kind)
+        else:
+            clusters.attach(q_id, key, leader_id)
+        with self.lock:
+            self.stats["questions"] += 1
+            if leader_id is not None: self.stats["exact_matches" if exact else "similar_matches"] += 1
+        return leader_id or q_id
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+        attached = stats["exact_matches"] + stats["similar_matches"]
+        stats["pipelines_avoided_percent"] = round(100 * attached / max(stats["questions"], 1), 1)
+        return stats
@@ -0,0 +1,131 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .metrics import span
+
+# --- RE-CHECK SCHEDULER ---
+# Replaces the "one thread per streamed chunk" re-check. Transcript growth is
+# coalesced into ticks, each tick only looks at unanswered questions that have
+# not been checked against the current index revision, and due questions are
+# batched into a single model call on a small bounded pool. One scheduler serves
+# every session; each tick only visits the sessions whose transcript grew.
+
+
+class RecheckScheduler:
+    def __init__(self, agent, emit, debounce=1.5, max_workers=2, batch_size=4):
+        self.agent = agent
+        self.emit = emit     # emit(event, data, to=room)
+        self.debounce = debounce
+        self.batch_size = max(1, batch_size)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="recheck")
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.in_flight = set()
+        self.dirty = {}  # { session_id: Session } whose transcript grew since the last tick
+        self.stats = {
+            "notifications": 0,
+            "ticks": 0,
+            "model_calls": 0,
+            "questions_checked": 0,
+            "skipped_unchanged": 0,
+            "answers_found": 0,
+            "dropped": 0,     # Shed by the work scheduler (stale or late) before reaching the model
+            "naive_calls": 0,  # What one-thread-per-chunk would have spent
+        }
+
+    def notify(self, session):
+        """Called on every transcript chunk; cheap, never blocks the stream."""
+        with self.lock:
+            self.stats["notifications"] += 1
+            self.stats["naive_calls"] += sum(1 for q in list(session.questions.values()) if q['status'] == 'unanswered')
+            self.dirty[session.id] = session
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="recheck-dispatcher", daemon=True)
+                self.thread.start()
+        self.wakeup.set()
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+        stats["calls_saved"] = max(0, stats["naive_calls"] - stats["model_calls"])
+        stats["in_flight"] = len(self.in_flight)
+        return stats
+
+    def _run(self):
+        while True:
+            self.wakeup.wait()
+            # Let chunks pile up for one debounce window, then check once for all of them
+            time.sleep(self.debounce)
+            self.wakeup.clear()
+            try:
+                self._tick()
+            except Exception as e:
+                print(f"[Recheck] Tick Error: {e}")
+
+    def _tick(self):
+        with self.lock:
+            self.stats["ticks"] += 1
+            sessions, self.dirty = list(self.dirty.values()), {}
+        for session in sessions:
+            self._tick_session(session)
+
+    def _tick_session(self, session):
+        revision = session.index.revision
+        with session.lock, self.lock:
+            due = []
+            for q_id, q in session.questions.items():
+                if q['status'] != 'unanswered' or q_id in self.in_flight: continue
+                if session.clusters.leader(q_id) != q_id: continue  # Duplicates get their leader's answer
+                if session.checked.get(q_id, -1) >= revision:
+                    self.stats["skipped_unchanged"] += 1
+                    continue
+                due.append(q)
+                self.in_flight.add(q_id)
+        if not due: return
+
+        print(f"[Recheck] {session.id}: re-checking {len(due)} pending questions (rev {revision})...")
+        for i in range(0, len(due), self.batch_size):
+            self.pool.submit(self._check_batch, session, due[i:i + self.batch_size], revision)
+
+    def _check_batch(self, session, batch, revision):
+        try:
+            transcript, index = session.transcript.snapshot(), session.index
+            # Shed by the work scheduler if the transcript moves on (or the deadline passes) while queued
+            job = self.agent.scheduler.job("recheck", session=session.id, stale=lambda: index.revision != revision)
+            with span("recheck", session=session.id, questions=len(batch)):
+                if len(batch) == 1:
+                    q = batch[0]
+                    answers = {q['id']: self.agent.extract_answer(q['text'], transcript, index, job=job)}
+                else:
+                    answers = self.agent.extract_answers_batch(batch, transcript, index, job=job)
+            if job.dropped:
+                with self.lock: self.stats["dropped"] += len(batch)
+                # Not marked checked, so the next tick picks them up again
+                with self.lock: self.dirty[session.id] = session
+                self.wakeup.set()
+                return
+
+            with self.lock:
+                self.stats["model_calls"] += 1
+                self.stats["questions_checked"] += len(batch)
+
+            for q in batch:
+                answer = answers.get(q['id']) or "[NOT_FOUND]"
+                with session.lock:
+                    session.checked[q['id']] = revision
+                    if "[NOT_FOUND]" in answer: continue
+                    # Skip questions answered elsewhere or dropped by a new upload meanwhile
+                    if q['status'] != 'unanswered' or session.questions.get(q['id']) is not q: continue
+                    session.checked.pop(q['id'], None)
+                    answered = session.settle(q['id'], 'answered', answer)
+                with self.lock:
+                    self.stats["answers_found"] += 1
+                for member in answered:
+                    self.emit('question_status_update', {'q_id': member['id'], 'status': 'answered'}, to=session.id)
+                    self.emit('new_answer', {'q_id': member['id'], 'answer': answer}, to=session.id)
+        except Exception as e:
+            print(f"[Recheck] Batch Error: {e}")
+        finally:
+            with self.lock:
+                for q in batch: self.in_flight.discard(q['id'])
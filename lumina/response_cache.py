@@ -0,0 +1,110 @@
+import os
+import re
+import time
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# --- RESPONSE CACHE ---
+# Sits in front of classify_question / extract_answer. A key is the normalized
+# question plus a fingerprint of the transcript window that was actually sent,
+# so "When is the launch?" and "hey when is the launch??" share an entry until
+# the retrieved passages change. Normalizing keeps the interrogative and the
+# word order: "Where is the launch?" and "Is B faster than A?" are other
+# questions with other answers. Memory tier is LRU + TTL; the optional SQLite
+# tier survives restarts.
+
+WORD_RE = re.compile(r"\w+")
+ARTICLES = frozenset(("a", "an", "the"))
+OPENERS = frozenset("hey hi hello guys host quick question ok okay so um lol pls".split())
+CLOSERS = frozenset("please pls thanks thx".split())
+
+
+def normalize_question(text):
+    """Lowercased words in order, without punctuation, articles or chat openers and sign-offs."""
+    words = [w for w in WORD_RE.findall(text.lower().replace("'", "")) if w not in ARTICLES]
+    start, end = 0, len(words)
+    while start < end and words[start] in OPENERS: start += 1
+    while end > start and words[end - 1] in CLOSERS: end -= 1
+    return " ".join(words[start:end]) or " ".join(text.lower().split())
+
+
+def fingerprint(context):
+    return hashlib.blake2b(context.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries=2048, ttl=1800, path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # { key: (expires_at, value) }
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "disk_hits": 0}
+        self.db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+            self.db.execute("DELETE FROM responses WHERE expires < ?", (time.time(),))
+            self.db.commit()
+
+    @staticmethod
+    def make_key(kind, question, context):
+        return f"{kind}|{normalize_question(question)}|{fingerprint(context)}"
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] >= now:
+                    self.entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                del self.entries[key]
+                self.stats["expirations"] += 1
+
+            if self.db is not None:
+                row = self.db.execute("SELECT value, expires FROM responses WHERE key = ?", (key,)).fetchone()
+                if row and row[1] >= now:
+                    value = json.loads(row[0])
+                    self._remember(key, value, row[1])
+                    self.stats["hits"] += 1
+                    self.stats["disk_hits"] += 1
+                    return value
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key, value):
+        expires = time.time() + self.ttl
+        with self.lock:
+            self._remember(key, value, expires)
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, json.dumps(value), expires))
+                self.db.commit()
+
+    def _remember(self, key, value, expires):
+        self.entries[key] = (expires, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            if self.db is not None:
+                self.db.execute("DELETE FROM responses")
+                self.db.commit()
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["size"] = len(self.entries)
+            lookups = stats["hits"] + stats["misses"]
+            stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+            stats["disk"] = self.db is not None
+        return stats
@@ -0,0 +1,118 @@
+import bisect
+import threading
+from .media_segments import STAMP_RE
+
+# --- TRANSCRIPT SEGMENT STORE ---
+# Replaces the single ever-growing transcript string. Every streamed chunk is
+# one segment with its char offset, the [MM:SS] time in effect when it started
+# and its stream id. Appends are O(1) list appends; tail windows, offset slices
+# and time-range slices only touch the segments they return. Readers take a
+# snapshot (segment count + length) and never see later appends, so they can
+# run alongside the streaming writer without locks or copies.
+
+
+def stamp_seconds(match):
+    h, m, s = match.groups()
+    return int(h or 0) * 3600 + int(m) * 60 + int(s)
+
+
+class _SegmentLog:
+    """Parallel append-only columns. Replaced (not cleared) on reset so old snapshots stay valid."""
+    def __init__(self):
+        self.texts = []
+        self.offsets = []   # Char offset of each segment's first character
+        self.stamps = []    # Seconds of the [MM:SS] in effect at segment start
+        self.streams = []
+
+
+class TranscriptSnapshot:
+    def __init__(self, log, count, length):
+        self.log = log
+        self.count = count
+        self.length = length
+
+    def __len__(self):
+        return self.length
+
+    def __bool__(self):
+        return self.length > 0
+
+    def __str__(self):
+        return self.text()
+
+    def text(self):
+        """Full text. Copies everything; prefer tail() / time_range() on hot paths."""
+        return "".join(self.log.texts[:self.count])
+
+    def tail(self, n_chars):
+        """The last n_chars characters (the old transcript[-n:])."""
+        if n_chars <= 0 or not self.count: return ""
+        return self.slice(max(self.length - n_chars, 0))
+
+    def slice(self, start, end=None):
+        """Characters [start, end) by absolute offset."""
+        end = self.length if end is None else min(end, self.length)
+        if start >= end: return ""
+        offsets = self.log.offsets
+        first = bisect.bisect_right(offsets, start, 0, self.count) - 1
+        last = bisect.bisect_left(offsets, end, 0, self.count)
+        text = "".join(self.log.texts[first:last])
+        base = offsets[first]
+        return text[start - base:end - base]
+
+    def time_range(self, start_s, end_s):
+        """Text spoken between two timestamps (segment granularity)."""
+        stamps = self.log.stamps
+        first = max(bisect.bisect_right(stamps, start_s, 0, self.count) - 1, 0)
+        last = bisect.bisect_right(stamps, end_s, 0, self.count)
+        return "".join(self.log.texts[first:last])
+
+    def segments(self):
+        log = self.log
+        for i in range(self.count):
+            yield {"offset": log.offsets[i], "timestamp": log.stamps[i], "stream_id": log.streams[i], "text": log.texts[i]}
+
+
+class SegmentStore:
+    def __init__(self):
+        self.lock = threading.Lock()  # Serializes writers only
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.log = _SegmentLog()
+            self.length = 0
+            self.current_stamp = 0
+            self.carry = ""  # Tail of the last chunk, to catch a [MM:SS] split across chunks
+
+    def append(self, text, stream_id=None):
+        if not text: return
+        with self.lock:
+            log = self.log
+            log.texts.append(text)
+            log.offsets.append(self.length)
+            log.stamps.append(self.current_stamp)
+            log.streams.append(stream_id)
+            self.length += len(text)
+            for match in STAMP_RE.finditer(self.carry + text):
+                self.current_stamp = stamp_seconds(match)
+            self.carry = text[-12:]
+
+    def snapshot(self):
+        with self.lock:
+            return TranscriptSnapshot(self.log, len(self.log.texts), self.length)
+
+    def __len__(self):
+        return self.length
+
+    def __bool__(self):
+        return self.length > 0
+
+    def tail(self, n_chars):
+        return self.snapshot().tail(n_chars)
+
+    def time_range(self, start_s, end_s):
+        return self.snapshot().time_range(start_s, end_s)
+
+    def text(self):
+        return self.snapshot().text()
@@ -0,0 +1,52 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+# --- SERVER MODE ---
+# LUMINA_ASYNC_MODE=threading (default) keeps the werkzeug dev server: one OS
+# thread per connection and per background task. LUMINA_ASYNC_MODE=gevent runs
+# the same code on greenlets under gevent's WSGI server; the standard library is
+# monkey-patched, so model calls (requests / aiohttp sockets), sleeps and locks
+# yield to the event loop instead of pinning a thread. LUMINA_MESSAGE_QUEUE
+# (e.g. redis://localhost:6379/0) lets several worker processes share rooms and
+# emits; see README for the sticky-routing setup in front of them.
+# This module must be imported before anything that touches threading or sockets.
+
+load_dotenv()
+ASYNC_MODE = os.getenv("LUMINA_ASYNC_MODE", "threading").strip().lower()
+MESSAGE_QUEUE = os.getenv("LUMINA_MESSAGE_QUEUE") or None
+HOST = os.getenv("LUMINA_HOST", "0.0.0.0")
+PORT = int(os.getenv("LUMINA_PORT", "5000"))
+
+if ASYNC_MODE not in ("threading", "gevent"):
+    raise ValueError(f"LUMINA_ASYNC_MODE must be 'threading' or 'gevent', got {ASYNC_MODE!r}")
+
+if ASYNC_MODE == "gevent":
+    # trio can't run under gevent: it needs the select.epoll that patching removes, and its
+    # import forks ldconfig, which gevent can't watch from a worker thread. httpcore (under
+    # the Gemini SDK) imports it whenever it is installed; hidden, httpcore does without it.
+    sys.modules["trio"] = None
+    from gevent import monkey
+    monkey.patch_all()
+
+
+def socketio_options():
+    return {"async_mode": ASYNC_MODE, "message_queue": MESSAGE_QUEUE}
+
+
+def run_native(fn):
+    """Run fn on an OS thread. A greenlet doing CPU-bound work (imports) would stall gevent's loop until it finished."""
+    if ASYNC_MODE == "gevent":
+        from gevent import get_hub
+        return get_hub().threadpool.spawn(fn)
+    import threading
+    threading.Thread(target=fn, daemon=True).start()
+
+
+def run(socketio, app):
+    """Serve until interrupted. The werkzeug dev server only backs threading mode."""
+    print(f"[Server] async_mode={ASYNC_MODE} message_queue={MESSAGE_QUEUE or 'none'} on {HOST}:{PORT}")
+    if ASYNC_MODE == "threading":
+        socketio.run(app, host=HOST, port=PORT, allow_unsafe_werkzeug=True)
+    else:
+        socketio.run(app, host=HOST, port=PORT, log_output=False)
@@ -0,0 +1,222 @@
+import re
+import time
+import threading
+from collections import Counter, deque
+from .transcript_index import TOKEN_RE, STOPWORDS, tokenize
+from .question_clusters import CHAT_WORDS, question_key
+
+# --- AUDIENCE COMMENTS ---
+# Comments reach the server one at a time (submit_comment) instead of the
+# client pasting its whole comment list into every Active query and report.
+# Each session keeps a rolling window of the latest comments. Spam (links,
+# floods, character runs) is dropped, a repeat from the same viewer is dropped,
+# and the same comment from another viewer raises the first one's count. As
+# comments arrive, sentiment is tallied and topic words are counted into
+# rolling themes, all locally. Prompts get digest(): counters, the top
+# themes, then notable and recent comments, cut to a token budget. Prompt size
+# stays the same whether the session has ten comments or a hundred thousand.
+
+LINK_RE = re.compile(r"https?://|www\.|\b[a-z0-9-]+\.(?:com|net|org|io|ru|xyz|ly)\b", re.I)
+RUN_RE = re.compile(r"(.)\1{7,}")
+NEGATIONS = frozenset("not no never dont don't isnt isn't wasnt wasn't cant can't didnt didn't".split())
+POSITIVE_WORDS = frozenset("""
+amazing awesome best brilliant clear cool excellent excited exciting fantastic good great helpful
+impressive interesting like love loved nice perfect thanks thank useful wow wonderful agree easy
+""".split())
+NEGATIVE_WORDS = frozenset("""
+awful bad boring confused confusing disappointed disappointing hard hate lost poor slow terrible
+unclear useless worse worst wrong annoying disagree fast lagging problem issue broken
+""".split())
+# Tone, chat and filler words say how a comment feels, not what it is about
+NOT_THEMES = frozenset(tokenize(" ".join(POSITIVE_WORDS | NEGATIVE_WORDS | NEGATIONS) + """
+ too also really very much still feel feels please need want get got thing things think know yes yeah
+ one make way now here finally exactly""")) | CHAT_WORDS
+TONES = {1: "positive", 0: "neutral", -1: "negative"}
+
+
+def comment_sentiment(text):
+    """Lexicon score of one comment: 1 positive, -1 negative, 0 neutral."""
+    score, negate = 0, False
+    for word in TOKEN_RE.findall(text.lower().replace("'", "")):
+        if word in NEGATIONS:
+            negate = True
+            continue
+        value = (word in POSITIVE_WORDS) - (word in NEGATIVE_WORDS)
+        score += -value if negate else value
+        negate = False
+    return (score > 0) - (score < 0)
+
+
+def spam_reason(text):
+    """Why a comment is spam, or None. Floods are checked per viewer in CommentStream.add."""
+    if not any(c.isalnum() for c in text): return "empty"  # Any script counts, not just ASCII
+    if LINK_RE.search(text): return "link"
+    if RUN_RE.search(text): return "repeated"
+    words = TOKEN_RE.findall(text.lower())
+    if len(words) >= 6 and len(set(words)) * 3 <= len(words): return "repeated"
+    return None
+
+
+def percentages(tally):
+    n = sum(tally.values()) or 1
+    return {TONES[s]: round(tally[s] * 100 / n) for s in (1, 0, -1)}
+
+
+def clip(text, limit):
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+class CommentStream:
+    """Per-session comment window, tallies and themes. Has its own lock: comments arrive off the question path."""
+    def __init__(self, window=1000, max_chars=300, max_per_minute=12, themes=6):
+        self.window = window
+        self.max_chars = max_chars        # Longer comments are cut before anything else sees them
+        self.max_per_minute = max_per_minute
+        self.top_themes = themes
+        self.lock = threading.Lock()
+        self.recent = deque()             # Entries in arrival order, at most `window`
+        self.by_key = {}                  # { normalized text: entry } for the window
+        self.sentiment = Counter()        # Whole session: { -1 | 0 | 1: comments }
+        self.window_sentiment = Counter() # Same, for the window only
+        self.themes = Counter()           # { term: comments in the window using it }
+        self.tones = {}                   # { term: Counter of sentiment } for the window
+        self.labels = {}                  # { term: first surface word seen }
+        self.quotes = {}                  # { term: latest comment using it }
+        self.rate = {}                    # { user: [minute, comments in it] }
+        self.stats = Counter()            # accepted, echoes, duplicates, spam_<reason>
+
+    def add(self, text, user=None, now=None):
+        """Ingest one comment. Returns "accepted", "echo", "duplicate" or a spam reason."""
+        text = clip(" ".join(str(text or "").split()), self.max_chars)
+        reason = spam_reason(text)
+        key = question_key(text)[0]  # Content terms: "lol love it!!" and "Love it" are the same comment
+        now = time.time() if now is None else now
+        with self.lock:
+            if reason is None and user is not None: reason = self._flood(user, now)
+            if reason is not None:
+                self.stats[f"spam_{reason}"] += 1
+                return reason
+            entry = self.by_key.get(key)
+            if entry is not None:
+                if user is not None and user in entry["users"]:
+                    self.stats["duplicates"] += 1
+                    return "duplicate"
+                # Another viewer saying the same thing: one line in the digest, with its count
+                entry["count"] += 1
+                entry["users"].add(user)
+                self._count(entry, 1)
+                self.stats["echoes"] += 1
+                return "echo"
+            entry = {"text": text, "key": key, "users": {user}, "count": 1, "time": now,
+                     "sentiment": comment_sentiment(text), "terms": self._terms(text)}
+            if len(self.recent) >= self.window: self._forget(self.recent.popleft())
+            self.recent.append(entry)
+            self.by_key[key] = entry
+            self._count(entry, 1)
+            for term in entry["terms"]: self.quotes[term] = text
+            self.stats["accepted"] += 1
+            return "accepted"
+
+    def _flood(self, user, now):
+        minute = int(now // 60)
+        slot = self.rate.get(user)
+        if slot is None or slot[0] != minute:
+            if len(self.rate) > 4 * self.window:  # Forget viewers who went quiet
+                self.rate = {u: s for u, s in self.rate.items() if s[0] == minute}
+            slot = self.rate[user] = [minute, 0]
+        slot[1] += 1
+        return "flood" if slot[1] > self.max_per_minute else None
+
+    def _terms(self, text):
+        words = [w for w in TOKEN_RE.findall(text.lower()) if w not in STOPWORDS]
+        terms = {}
+        for word, term in zip(words, tokenize(" ".join(words))):
+            if len(term) > 2 and term not in NOT_THEMES and not term.isdigit(): terms.setdefault(term, word)
+        for term, word in terms.items(): self.labels.setdefault(term, word)
+        return tuple(terms)
+
+    def _count(self, entry, n):
+        """Add (n=1) or remove (n=-count) an entry's weight from the running tallies."""
+        s = entry["sentiment"]
+        if n > 0: self.sentiment[s] += n
+        self.window_sentiment[s] += n
+        for term in entry["terms"]:
+            self.themes[term] += n
+            self.tones.setdefault(term, Counter())[s] += n
+            if self.themes[term] <= 0:
+                for table in (self.themes, self.tones, self.labels, self.quotes): table.pop(term, None)
+
+    def _forget(self, entry):
+        self._count(entry, -entry["count"])
+        if self.by_key.get(entry["key"]) is entry: del self.by_key[entry["key"]]
+
+    # --- DIGEST ---
+    def tallies(self):
+        """Whole-session sentiment counts, for the report's percentages."""
+        with self.lock: return {TONES[s]: self.sentiment[s] for s in (1, 0, -1)}
+
+    def theme_summaries(self, limit=None):
+        """Rolling themes of the window, most discussed first: [{ theme, comments, tone, example }].
+
+        Words that keep turning up in the same comments ("pricing", "high") are one theme.
+        """
+        limit = limit or self.top_themes
+        with self.lock:
+            out, by_quote = [], {}
+            for term, n in self.themes.most_common(limit * 4):
+                quote = self.quotes[term]
+                if quote in by_quote:
+                    theme = by_quote[quote]
+                    if theme["theme"].count(",") < 2: theme["theme"] += f", {self.labels[term]}"
+                    continue
+                if len(out) == limit: continue
+                tone = self.tones[term]
+                pos, neg = tone[1] / n, tone[-1] / n
+                label = ("mostly positive" if pos >= 0.5 else "mostly negative" if neg >= 0.5 else
+                         "mixed" if pos and neg else "neutral")
+                theme = by_quote[quote] = {"theme": self.labels[term], "comments": n, "tone": label, "example": quote}
+                out.append(theme)
+            return out
+
+    def digest(self, max_tokens=600):
+        """Prompt text of at most ~max_tokens: counters, themes, then notable and recent comments."""
+        budget = max_tokens * 4
+        with self.lock:
+            total = sum(self.sentiment.values())
+            if not total: return "No comments yet."
+            dropped = sum(v for k, v in self.stats.items() if k.startswith("spam_")) + self.stats["duplicates"]
+            overall, recent = percentages(self.sentiment), percentages(self.window_sentiment)
+            entries = list(self.recent)
+        in_window = sum(e["count"] for e in entries)
+        lines = [f"{total} comments ({dropped} dropped as spam or repeats). Sentiment: " +
+                 ", ".join(f"{p}% {tone}" for tone, p in overall.items()) +
+                 (f"; latest {in_window}: " + ", ".join(f"{p}% {tone}" for tone, p in recent.items())
+                  if in_window < total else "") + "."]
+        used = len(lines[0])
+        themes = self.theme_summaries()
+        if themes:
+            lines.append("Themes:")
+            for t in themes:
+                line = f"- {t['theme']}: {t['comments']} comment{'s' if t['comments'] != 1 else ''}, {t['tone']}, e.g. \"{clip(t['example'], 100)}\""
+                if used + len(line) > budget // 2: break
+                lines.append(line)
+                used += len(line) + 1
+        # Negative and question-like comments first (they carry the concerns), then the most recent
+        newest = entries[::-1]
+        flagged = [e for e in newest if e["sentiment"] < 0 or "?" in e["text"]]
+        picked, seen = [], set()
+        for limit, candidates in ((used + (budget - used) * 3 // 4, flagged), (budget, newest)):
+            for e in candidates:
+                if id(e) in seen: continue
+                line = f"- {clip(e['text'], 200)}" + (f" (x{e['count']})" if e["count"] > 1 else "")
+                if used + len(line) + 1 > limit: break
+                picked.append(line)
+                seen.add(id(e))
+                used += len(line) + 1
+        if picked: lines += ["Comments (concerns and questions first, then newest):"] + picked
+        return "\n".join(lines)
+
+    def snapshot(self):
+        with self.lock:
+            return dict(self.stats, window=len(self.recent), themes=len(self.themes),
+                        total=sum(self.sentiment.values()))
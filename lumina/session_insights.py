@@ -0,0 +1,161 @@
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from .transcript_index import TOKEN_RE, STOPWORDS, tokenize
+from .media_segments import STAMP_RE
+from .metrics import span
+
+# --- INCREMENTAL CREATOR INSIGHTS ---
+# Map: as the transcript grows, every closed window of `window_chars` is
+# summarized once in the background. Question topics are counted locally as
+# they arrive, and comments are tallied by the session's CommentStream
+# (session_comments.py). Reduce: the dashboard report is one small model call
+# over the window summaries, counters and the comment digest, so it costs the
+# same whether the session ran ten minutes or three hours.
+
+class InsightState:
+    """Per-session partial results. Replaced (not cleared) on reset so in-flight maps land nowhere."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.windows = []       # [{ 'start', 'end', 'from', 'to', 'summary', 'topics', 'unclear_points' }]
+        self.mapped_to = 0      # Char offset where the next un-summarized window starts
+        self.mapping = False
+        self.topics = Counter() # Terms from relevant questions
+        self.labels = {}        # { stemmed term: first surface word seen }
+
+
+class InsightEngine:
+    def __init__(self, agent, window_chars=8000, max_workers=1, comment_tokens=800):
+        self.agent = agent
+        self.window_chars = window_chars
+        self.comment_tokens = comment_tokens  # Budget for the comment digest in the reduce prompt
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="insights")
+        self.lock = threading.Lock()
+        self.stats = {"windows_mapped": 0, "map_errors": 0, "reports": 0}
+
+    # --- MAP (runs while the session streams) ---
+    def notify(self, session):
+        """Called on every transcript chunk; schedules summaries for windows that just closed."""
+        state = session.insights
+        with state.lock:
+            if state.mapping or len(session.transcript) - state.mapped_to < self.window_chars: return
+            state.mapping = True
+        self.pool.submit(self._map_windows, session, state)
+
+    def _map_windows(self, session, state):
+        try:
+            while session.insights is state:
+                transcript = session.transcript.snapshot()
+                start = state.mapped_to
+                if len(transcript) - start < self.window_chars: break
+                text = transcript.slice(start, start + self.window_chars)
+                # End the window on a line break so a sentence is not split across two summaries
+                cut = text.rfind("\n", self.window_chars // 2)
+                if cut > 0: text = text[:cut + 1]
+                with span("insights_map", session=session.id, chars=len(text)):
+                    summary = self.agent.summarize_transcript_window(text, job=self._job(session))
+                stamps = [m.group(0) for m in STAMP_RE.finditer(text)]
+                window = dict(summary, start=start, end=start + len(text))
+                window["from"], window["to"] = (stamps[0], stamps[-1]) if stamps else (None, None)
+                with state.lock:
+                    # A failed summary is skipped rather than retried forever
+                    if summary.get("summary"): state.windows.append(window)
+                    state.mapped_to = window["end"]
+                with self.lock:
+                    self.stats["windows_mapped" if summary.get("summary") else "map_errors"] += 1
+        except Exception as e:
+            print(f"[Creator Engine] Window Summary Error: {e}")
+        finally:
+            with state.lock: state.mapping = False
+
+    def _job(self, session):
+        # Map and reduce calls for one session never run side by side
+        return self.agent.scheduler.job("insights", session=session.id, exclusive=True)
+
+    def observe_question(self, session, question):
+        """Count the topic words of a question once it is classified relevant."""
+        state = session.insights
+        words = [w for w in TOKEN_RE.findall(question['text'].lower()) if w not in STOPWORDS and len(w) > 2]
+        with state.lock:
+            for word, term in zip(words, tokenize(" ".join(words))):
+                state.topics[term] += 1
+                state.labels.setdefault(term, word)
+
+    # --- REDUCE (on demand) ---
+    def report(self, session):
+        state = session.insights
+        with session.lock:
+            questions = list(session.questions.values())
+            counts = {leader_id: len(ids) for leader_id, ids in session.clusters.members.items()}
+        transcript = session.transcript.snapshot()
+        if not transcript and not questions:
+            return {"error": "Insufficient session data to generate insight."}
+
+        comments = session.comments
+        tallies = comments.tallies()
+        with state.lock:
+            windows = list(state.windows)
+            mapped_to = state.mapped_to
+            topics = [state.labels[t] for t, _ in state.topics.most_common(10)]
+
+        overview = self._overview(questions, sum(tallies.values()))
+        sentiment = self._sentiment(tallies)
+        # Repeats count towards their first asking, which is listed once with its popularity
+        leaders = [q for q in questions if q['id'] in counts]
+        unanswered = [q['text'] + (f" (asked {counts[q['id']]}x)" if counts[q['id']] > 1 else "")
+                      for q in leaders if q['status'] == 'unanswered'][-25:]
+        popular = [{"question": q['text'], "asked": counts[q['id']], "status": q['status']}
+                   for q in sorted(leaders, key=lambda q: counts[q['id']], reverse=True)[:5] if counts[q['id']] > 1]
+        # Text not yet covered by a window summary (the open window, plus any backlog)
+        latest = transcript.slice(max(mapped_to, len(transcript) - 2 * self.window_chars))
+
+        digest = {
+            "windows": windows, "latest": latest, "overview": overview, "sentiment": sentiment,
+            "topics": topics, "unanswered": unanswered, "comments": comments.digest(self.comment_tokens),
+        }
+        with self.lock: self.stats["reports"] += 1
+        with span("insights_reduce", session=session.id, windows=len(windows)):
+            result = self.agent.generate_creator_insights(digest, job=self._job(session)) or {}
+
+        # Counts and percentages are computed here; the model only supplies the qualitative parts
+        return {
+            "session_overview": overview,
+            "top_interest_topics": result.get("top_interest_topics") or topics[:5],
+            "clarity_gaps": result.get("clarity_gaps") or [
+                {"topic": "Unanswered question", "evidence": text} for text in unanswered[-3:]
+            ],
+            "sentiment_summary": dict(sentiment, audience_vibe=result.get("audience_vibe") or sentiment["audience_vibe"]),
+            "potential_misunderstandings": result.get("potential_misunderstandings") or
+                list(dict.fromkeys(p for w in windows for p in w.get("unclear_points", [])))[:5],
+            "delivery_improvement_suggestions": result.get("delivery_improvement_suggestions") or [],
+            "popular_questions": popular,
+            "comment_themes": comments.theme_summaries(),
+            "coverage": {"windows": len(windows), "transcript_chars": len(transcript)},
+        }
+
+    @staticmethod
+    def _overview(questions, n_comments):
+        status = Counter(q['status'] for q in questions)
+        asked = status['relevant'] + status['answered'] + status['unanswered']
+        interactions = len(questions) + n_comments
+        return {
+            "total_questions": len(questions),
+            "relevant_asked": asked,
+            "relevant_answered": status['answered'],
+            "relevant_unanswered": asked - status['answered'],
+            "off_topic_asked": status['off_topic'],
+            "engagement_level": "high" if interactions >= 25 else "medium" if interactions >= 8 else "low",
+        }
+
+    @staticmethod
+    def _sentiment(tallies):
+        n = sum(tallies.values()) or 1
+        pos, neg = tallies["positive"] * 100 / n, tallies["negative"] * 100 / n
+        neutral = max(100.0 - pos - neg, 0.0)
+        vibe = ("No comments yet" if not any(tallies.values()) else "Mostly positive" if pos >= 50 else
+                "Mixed, with concerns" if neg >= 25 else "Calm and neutral")
+        return {"positive_percent": round(pos, 1), "neutral_percent": round(neutral, 1),
+                "negative_percent": round(neg, 1), "audience_vibe": vibe}
+
+    def snapshot(self):
+        with self.lock: return dict(self.stats)
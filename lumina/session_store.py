@@ -0,0 +1,298 @@
+import os
+import re
+import html
+import time
+import uuid
+import sqlite3
+import threading
+from collections import OrderedDict
+from .transcript_index import TIMESTAMP_RE, TOKEN_RE, tokenize
+from .metrics import span
+
+# --- PERSISTENT SESSION STORE ---
+# Sessions, transcript segments, questions and answers in one SQLite file, so a
+# restart loses nothing. The hot paths only append to in-memory pending lists;
+# a writer thread flushes them every `flush_interval` seconds in one
+# transaction (repeated status changes of a question collapse into one upsert).
+# Each upload in a room is its own media row: a new video starts a fresh
+# transcript without deleting the old one, so history stays searchable.
+# Sessions are restored lazily by SessionManager the first time they are used.
+# Transcript text is also cut into timestamped passages (as in
+# transcript_index.py) and indexed with FTS5 next to the questions and answers,
+# which is what /search queries across every video. The session id is an FTS
+# column too, so a search scoped to one room intersects posting lists instead
+# of filtering every match, and only the newest `candidates` matches of a query
+# are scored, so a word said in every video costs the same at 100 or 10,000 sessions.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, media TEXT, created REAL, last_active REAL);
+CREATE TABLE IF NOT EXISTS media (id TEXT PRIMARY KEY, session TEXT, filename TEXT, content_hash TEXT, started REAL);
+CREATE TABLE IF NOT EXISTS segments (id INTEGER PRIMARY KEY, media TEXT, stream_id TEXT, text TEXT);
+CREATE INDEX IF NOT EXISTS segments_media ON segments (media, id);
+CREATE TABLE IF NOT EXISTS passages (id INTEGER PRIMARY KEY, media TEXT, session TEXT, stamp TEXT, text TEXT);
+CREATE TABLE IF NOT EXISTS questions (id TEXT PRIMARY KEY, media TEXT, session TEXT, kind TEXT, user TEXT, text TEXT,
+                                      status TEXT, answer TEXT, cluster TEXT, timestamp REAL);
+CREATE INDEX IF NOT EXISTS questions_media ON questions (media, timestamp);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS passages_fts USING fts5 (text, session, content='passages', content_rowid='id',
+                                                             tokenize='porter unicode61');
+CREATE TRIGGER IF NOT EXISTS passages_ai AFTER INSERT ON passages BEGIN
+    INSERT INTO passages_fts (rowid, text, session) VALUES (new.id, new.text, new.session);
+END;
+CREATE TRIGGER IF NOT EXISTS passages_ad AFTER DELETE ON passages BEGIN
+    INSERT INTO passages_fts (passages_fts, rowid, text, session) VALUES ('delete', old.id, old.text, old.session);
+END;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5 (text, answer, session, content='questions',
+                                                              content_rowid='rowid', tokenize='porter unicode61');
+CREATE TRIGGER IF NOT EXISTS questions_ai AFTER INSERT ON questions BEGIN
+    INSERT INTO questions_fts (rowid, text, answer, session) VALUES (new.rowid, new.text, new.answer, new.session);
+END;
+CREATE TRIGGER IF NOT EXISTS questions_ad AFTER DELETE ON questions BEGIN
+    INSERT INTO questions_fts (questions_fts, rowid, text, answer, session)
+    VALUES ('delete', old.rowid, old.text, old.answer, old.session);
+END;
+CREATE TRIGGER IF NOT EXISTS questions_au AFTER UPDATE ON questions BEGIN
+    INSERT INTO questions_fts (questions_fts, rowid, text, answer, session)
+    VALUES ('delete', old.rowid, old.text, old.answer, old.session);
+    INSERT INTO questions_fts (rowid, text, answer, session) VALUES (new.rowid, new.text, new.answer, new.session);
+END;
+"""
+
+QUESTION_FIELDS = ("id", "user", "text", "status", "answer", "cluster", "timestamp")
+
+
+def new_media_id():
+    return uuid.uuid4().hex[:16]
+
+
+def match_query(words, columns, session_id=None):
+    """FTS5 query: every word in one of `columns`, the last as a prefix (search-as-you-type), optionally one session."""
+    terms = " ".join(f'"{w}"' for w in words[:-1]) + (" " if len(words) > 1 else "") + f'"{words[-1]}"*'
+    query = f"{{{' '.join(columns)}}} : ({terms})"
+    if session_id:
+        query += f' AND session : "{" ".join(TOKEN_RE.findall(session_id.lower()))}"'
+    return query
+
+
+def highlighter(words):
+    """Regex for query words matched on their stem as a prefix, close to what the porter tokenizer matched."""
+    stems = tokenize(" ".join(words)) or words
+    return re.compile(r"\b(?:" + "|".join(re.escape(s) for s in stems) + r")\w*", re.I)
+
+
+def highlight(text, pattern, width=200):
+    """About `width` chars of text around the first match as HTML: escaped, matches wrapped in <mark>.
+
+    Stored text is anyone's chat or transcript, shown to every searcher. Built here for the few rows returned: FTS5's snippet() would run on every
+    scored candidate.
+    """
+    first = pattern.search(text)
+    start = max((first.start() if first else 0) - width // 3, 0)
+    if start: start = text.find(" ", start) + 1 or start
+    end = min(start + width, len(text))
+    if end < len(text): end = text.rfind(" ", start, end) if text.rfind(" ", start, end) > start else end
+    window, last = [], start
+    for m in pattern.finditer(text, start, end):
+        window.append(html.escape(text[last:m.start()]) + f"<mark>{html.escape(m.group(0))}</mark>")
+        last = m.end()
+    window = "".join(window) + html.escape(text[last:end])
+    return ("…" if start else "") + window + ("…" if end < len(text) else "")
+
+
+class _Pending:
+    """Writes accumulated between two flushes."""
+    def __init__(self):
+        self.sessions = {}   # { session_id: (media, created, last_active) }
+        self.media = {}      # { media_id: (session_id, filename, content_hash, started) }
+        self.segments = []   # [(media_id, session_id, stream_id, text)] in arrival order
+        self.questions = {}  # { q_id: row } latest state only
+
+    def __len__(self):
+        return len(self.sessions) + len(self.media) + len(self.segments) + len(self.questions)
+
+
+class SessionStore:
+    def __init__(self, path, flush_interval=1.0, max_passage_chars=1200, candidates=500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_passage_chars = max_passage_chars
+        self.candidates = candidates  # Newest matches scored per search
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = self._connect()  # Writer connection, used under write_lock only
+        self.db.executescript(SCHEMA)
+        self.local = threading.local()  # One reader connection per thread (WAL readers never block the writer)
+        self.lock = threading.Lock()        # Guards pending
+        self.write_lock = threading.Lock()  # One flush at a time
+        self.pending = _Pending()
+        self.tails = OrderedDict()  # { media_id: (passage rowid, text) } open passage still growing
+        self.stats = {"flushes": 0, "rows_written": 0, "last_flush_ms": 0.0, "flush_errors": 0,
+                      "loads": 0, "searches": 0}
+        self.wake = threading.Event()
+        self.closed = False
+        self.writer = threading.Thread(target=self._writer_loop, name="session-store-writer", daemon=True)
+        self.writer.start()
+        print(f"[SessionStore] {path} | flush every {flush_interval}s")
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _reader(self):
+        db = getattr(self.local, "db", None)
+        if db is None: db = self.local.db = self._connect()
+        return db
+
+    # --- HOT PATH (memory only) ---
+    def _session_row(self, session):
+        self.pending.sessions[session.id] = (session.media_id, session.created, time.time())
+        # Questions asked before any upload still need a media row to hang off
+        self.pending.media.setdefault(session.media_id, (session.id, None, None, session.created))
+
+    def start_media(self, session, filename=None, content_hash=None):
+        with self.lock:
+            self.pending.media[session.media_id] = (session.id, filename, content_hash, time.time())
+            self._session_row(session)
+
+    def append_segment(self, session, text, stream_id=None):
+        with self.lock:
+            self.pending.segments.append((session.media_id, session.id, stream_id, text))
+            self._session_row(session)
+
+    def save_questions(self, session, questions, kind="question"):
+        with self.lock:
+            for q in questions:
+                self.pending.questions[q['id']] = (q['id'], session.media_id, session.id, kind, q.get('user'), q['text'],
+                                                   q.get('status'), q.get('answer'), q.get('cluster'), q.get('timestamp'))
+            self._session_row(session)
+
+    # --- WRITER ---
+    def _writer_loop(self):
+        while not self.closed:
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write everything pending in one transaction. Returns the number of rows written."""
+        with self.write_lock:
+            with self.lock:
+                batch, self.pending = self.pending, _Pending()
+            if not len(batch): return 0
+            start = time.perf_counter()
+            try:
+                with span("store_flush", rows=len(batch)), self.db:
+                    self.db.executemany("""INSERT INTO media VALUES (?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE
+                                           SET filename = coalesce(excluded.filename, filename),
+                                               content_hash = coalesce(excluded.content_hash, content_hash)""",
+                                        [(m,) + row for m, row in batch.media.items()])
+                    self.db.executemany("""INSERT INTO sessions VALUES (?, ?, ?, ?) ON CONFLICT (id) DO UPDATE
+                                           SET media = excluded.media, last_active = excluded.last_active""",
+                                        [(s,) + row for s, row in batch.sessions.items()])
+                    self.db.executemany("INSERT INTO segments (media, stream_id, text) VALUES (?, ?, ?)",
+                                        [(media, stream_id, text) for media, _, stream_id, text in batch.segments])
+                    self._write_passages(batch.segments)
+                    self.db.executemany("""INSERT INTO questions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (id) DO UPDATE
+                                           SET status = excluded.status, answer = excluded.answer, cluster = excluded.cluster""",
+                                        list(batch.questions.values()))
+            except sqlite3.Error as e:
+                print(f"[SessionStore] Flush Error: {e}")
+                with self.lock: self.stats["flush_errors"] += 1
+                return 0
+            with self.lock:
+                self.stats["flushes"] += 1
+                self.stats["rows_written"] += len(batch)
+                self.stats["last_flush_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return len(batch)
+
+    def _write_passages(self, segments):
+        """Cut new transcript text into passages at [MM:SS] markers; the open tail is rewritten each flush."""
+        grown = OrderedDict()
+        for media, session_id, _, text in segments:
+            grown[media, session_id] = grown.get((media, session_id), "") + text
+        for (media, session_id), text in grown.items():
+            rowid, buffer = self.tails.pop(media, (None, ""))
+            if rowid is not None: self.db.execute("DELETE FROM passages WHERE id = ?", (rowid,))
+            buffer += text
+            while True:
+                markers = [m.start() for m in TIMESTAMP_RE.finditer(buffer) if m.start() > 0]
+                if markers: cut = markers[0]
+                elif len(buffer) > self.max_passage_chars:
+                    cut = buffer.rfind(" ", self.max_passage_chars // 2, self.max_passage_chars) + 1 or self.max_passage_chars
+                else: break
+                self._insert_passage(media, session_id, buffer[:cut])
+                buffer = buffer[cut:]
+            rowid = self._insert_passage(media, session_id, buffer)
+            if rowid is not None: self.tails[media] = (rowid, buffer)
+        while len(self.tails) > 1000: self.tails.popitem(last=False)
+
+    def _insert_passage(self, media, session_id, text):
+        text = text.strip()
+        if not text: return None
+        stamp = TIMESTAMP_RE.match(text)
+        return self.db.execute("INSERT INTO passages (media, session, stamp, text) VALUES (?, ?, ?, ?)",
+                               (media, session_id, stamp.group(0) if stamp else None, text)).lastrowid
+
+    def close(self):
+        self.closed = True
+        self.wake.set()
+        self.flush()
+
+    # --- READ PATH ---
+    def load(self, session_id):
+        """Stored state of a session's current media, or None if the session was never saved."""
+        self.flush()  # A session evicted a moment ago may still have writes in flight
+        db = self._reader()
+        with span("store_load", session=session_id):
+            row = db.execute("SELECT media, created, last_active FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None: return None
+            media, created, last_active = row
+            segments = db.execute("SELECT stream_id, text FROM segments WHERE media = ? ORDER BY id", (media,)).fetchall()
+            questions = [dict(zip(QUESTION_FIELDS, q)) for q in db.execute(
+                f"SELECT {', '.join(QUESTION_FIELDS)} FROM questions WHERE media = ? AND kind = 'question' ORDER BY timestamp",
+                (media,))]
+        with self.lock: self.stats["loads"] += 1
+        return {"media": media, "created": created, "last_active": last_active,
+                "segments": segments, "questions": questions}
+
+    def search(self, text, limit=20, session_id=None):
+        """Full-text search over every stored transcript, question and answer, best matches first."""
+        words = TOKEN_RE.findall(text.lower())[:12]  # Letters and digits in any script, as unicode61 splits them
+        if not words: return {"transcript": [], "questions": []}
+        db = self._reader()
+        with span("search", limit=limit):
+            passages = self._fetch(db, "passages", match_query(words, ("text",), session_id), "bm25(passages_fts, 1, 0)", """
+                SELECT p.id, p.session, m.filename, p.stamp, p.text FROM passages p JOIN media m ON m.id = p.media
+                WHERE p.id IN ({})""", limit, session_id)
+            questions = self._fetch(db, "questions", match_query(words, ("text", "answer"), session_id),
+                                    "bm25(questions_fts, 1, 1, 0)", """
+                SELECT q.rowid, q.session, m.filename, q.kind, q.user, q.text, q.status, q.answer, q.timestamp
+                FROM questions q JOIN media m ON m.id = q.media WHERE q.rowid IN ({})""", limit, session_id)
+        with self.lock: self.stats["searches"] += 1
+        pattern = highlighter(words)
+        return {
+            "transcript": [{"session_id": sid, "media": f, "timestamp": st, "snippet": highlight(t, pattern), "score": score}
+                           for score, (_, sid, f, st, t) in passages],
+            "questions": [{"session_id": sid, "media": f, "kind": k, "user": u, "question": t, "status": st,
+                           "answer": a, "asked_at": ts, "score": score}
+                          for score, (_, sid, f, k, u, t, st, a, ts) in questions],
+        }
+
+    def _fetch(self, db, table, query, rank, rows_sql, limit, session_id):
+        """[(score, row)] for the best `limit` of the newest `candidates` matches."""
+        scored = db.execute(f"SELECT rowid, {rank} FROM {table}_fts WHERE {table}_fts MATCH ? ORDER BY rowid DESC LIMIT ?",
+                            (query, self.candidates)).fetchall()
+        best = dict(sorted(scored, key=lambda r: r[1])[:limit])
+        if not best: return []
+        rows = db.execute(rows_sql.format(",".join("?" * len(best))), list(best)).fetchall()
+        # The session column matches on tokens; drop rooms that only share them ("a-b" vs "a_b")
+        if session_id: rows = [r for r in rows if r[1] == session_id]
+        return sorted(((round(-best[r[0]], 3), r) for r in rows), key=lambda item: -item[0])
+
+    def snapshot(self):
+        with self.lock:
+            stats = dict(self.stats, pending_rows=len(self.pending))
+        stats["size_mb"] = round(sum(os.path.getsize(p) for p in (self.path, self.path + "-wal") if os.path.exists(p)) / 1024 / 1024, 2)
+        return stats
@@ -0,0 +1,235 @@
+import time
+import threading
+from collections import Counter, OrderedDict
+from .segment_store import SegmentStore
+from .transcript_index import TranscriptIndex
+from .session_insights import InsightState
+from .session_comments import CommentStream
+from .question_clusters import QuestionClusters
+from .session_store import new_media_id
+
+# --- SESSIONS ---
+# One Session per video room. Everything that used to live in the global
+# SESSION_STATE (transcript, retrieval index, questions) is per session, emits
+# go to the session's Socket.IO room, and idle sessions are evicted LRU-first
+# once the session count or the estimated memory use passes its cap. With a
+# SessionStore (session_store.py) every change is also queued for disk, and an
+# evicted or pre-restart session is restored the next time its room is used.
+
+DEFAULT_SESSION = "default"
+
+
+def clean_session_id(value):
+    """Room ids come from the client: keep them short and printable."""
+    value = "".join(c for c in str(value or "") if c.isalnum() or c in "-_")[:64]
+    return value or DEFAULT_SESSION
+
+
+class Session:
+    def __init__(self, session_id, store=None, comment_window=1000):
+        self.id = session_id
+        self.store = store
+        self.media_id = new_media_id()  # Current upload; stored rows hang off it
+        self.lock = threading.RLock()  # Guards questions and their status changes
+        self.transcript = SegmentStore()
+        self.index = TranscriptIndex()
+        self.questions = {}  # { q_id: { ... } }
+        self.checked = {}    # { q_id: index revision at last re-check }
+        self.insights = InsightState()  # Window summaries + running counters for the creator report
+        self.clusters = QuestionClusters()  # Duplicate questions attached to the first one asked
+        self.comment_window = comment_window
+        self.comments = CommentStream(window=comment_window)  # Rolling window, tallies and themes for prompts
+        self.members = set()  # Connected Socket.IO sids
+        self.created = self.last_active = time.time()
+
+    def reset(self, filename=None, content_hash=None):
+        """New media in this room: drop transcript and questions (stored ones stay searchable)."""
+        with self.lock:
+            self.transcript.reset()
+            self.index.reset()
+            self.questions = {}
+            self.checked = {}
+            self.insights = InsightState()
+            self.clusters = QuestionClusters()
+            self.comments = CommentStream(window=self.comment_window)
+            self.media_id = new_media_id()
+        if self.store is not None: self.store.start_media(self, filename, content_hash)
+        self.touch()
+
+    def restore(self, record):
+        """Rebuild transcript, index and questions from SessionStore.load()."""
+        with self.lock:
+            self.media_id = record["media"]
+            self.created = record["created"]
+            for stream_id, text in record["segments"]:
+                self.transcript.append(text, stream_id)
+            self.index.append("".join(text for _, text in record["segments"]))  # One pass cuts every passage
+            for q in record["questions"]:
+                # Interrupted mid-pipeline by the restart: re-checked like any unanswered question
+                if q['status'] in ('pending', 'relevant'): q['status'] = 'unanswered'
+                self.questions[q['id']] = q
+                self.clusters.restore(q['id'], q['text'], q['cluster'])
+
+    def append(self, text, stream_id=None):
+        """Streamed transcript text: segment store, retrieval index, and disk if persistent."""
+        self.transcript.append(text, stream_id)
+        self.index.append(text)
+        if self.store is not None: self.store.append_segment(self, text, stream_id)
+        self.touch()
+
+    def save(self, questions):
+        if self.store is not None and questions: self.store.save_questions(self, questions)
+
+    def settle(self, q_id, status, answer=None):
+        """Set the status (and answer) of a question and every duplicate attached to it.
+
+        Returns the updated entries so the caller can emit one update per question.
+        """
+        with self.lock:
+            updated = []
+            for member_id in self.clusters.cluster(q_id):
+                q = self.questions.get(member_id)
+                if q is None: continue
+                q['status'] = status
+                if answer is not None: q['answer'] = answer
+                updated.append(q)
+            self.save(updated)
+            return updated
+
+    def touch(self):
+        self.last_active = time.time()
+
+    def memory_estimate(self):
+        """Rough bytes held: transcript text + index postings (~3x text) + question dicts + comment window."""
+        return len(self.transcript) * 4 + len(self.questions) * 1024 + len(self.comments.recent) * 1024
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "members": len(self.members),
+            "questions": len(self.questions),
+            "comments": self.comments.snapshot()["total"],
+            "transcript_chars": len(self.transcript),
+            "idle_seconds": round(time.time() - self.last_active, 1),
+        }
+
+
+class SessionManager:
+    def __init__(self, max_sessions=500, max_memory_mb=512, idle_ttl=3600, sweep_interval=60, store=None,
+                 comment_window=1000):
+        self.max_sessions = max_sessions
+        self.max_memory = max_memory_mb * 1024 * 1024
+        self.idle_ttl = idle_ttl
+        self.sweep_interval = sweep_interval
+        self.sessions = OrderedDict()  # LRU order: least recently used first
+        self.sid_sessions = {}  # { sid: session_id }
+        self.lock = threading.Lock()
+        self.sweeper = None
+        self.evictions = 0
+        self.restores = 0
+        self.store = store
+        self.comment_window = comment_window
+
+    def get(self, session_id):
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is not None:
+                self.sessions.move_to_end(session_id)
+                session.touch()
+            return session
+
+    def get_or_create(self, session_id):
+        session_id = clean_session_id(session_id)
+        restored = None
+        if self.store is not None:
+            with self.lock:
+                known = session_id in self.sessions
+            if not known:
+                # Disk read outside the manager lock; a concurrent restore of the same room loses the race below
+                record = self.store.load(session_id)
+                if record is not None:
+                    restored = Session(session_id, self.store, self.comment_window)
+                    restored.restore(record)
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = restored or Session(session_id, self.store, self.comment_window)
+                if restored is not None:
+                    self.restores += 1
+                    print(f"[Sessions] Restored {session_id} ({len(session.transcript)} chars, {len(session.questions)} questions)")
+                self._enforce_limits(keep=session_id)
+            self.sessions.move_to_end(session_id)
+            session.touch()
+            if self.sweeper is None:
+                self.sweeper = threading.Thread(target=self._sweep_loop, name="session-sweeper", daemon=True)
+                self.sweeper.start()
+        return session
+
+    def join(self, session_id, sid):
+        previous = self.leave(sid)
+        session = self.get_or_create(session_id)
+        with self.lock:
+            session.members.add(sid)
+            self.sid_sessions[sid] = session.id
+        return session, previous
+
+    def leave(self, sid):
+        """Forget a disconnected (or room-switching) client. Returns the session id it was in."""
+        with self.lock:
+            session_id = self.sid_sessions.pop(sid, None)
+            session = self.sessions.get(session_id)
+            if session is not None: session.members.discard(sid)
+            return session_id
+
+    def for_sid(self, sid):
+        with self.lock:
+            session_id = self.sid_sessions.get(sid)
+        return self.get(session_id) if session_id else None
+
+    def _evictable(self, now, ttl, keep=None):
+        """Idle sessions (nobody connected, untouched for `ttl` seconds), least recently used first."""
+        return [s for s in self.sessions.values() if not s.members and s.id != keep and now - s.last_active >= ttl]
+
+    def _enforce_limits(self, keep=None):
+        now = time.time()
+        for session in self._evictable(now, self.idle_ttl, keep):
+            self._evict(session, "idle")
+        over = lambda: (len(self.sessions) > self.max_sessions
+                        or sum(s.memory_estimate() for s in self.sessions.values()) > self.max_memory)
+        if not over(): return
+        # Under pressure, sessions with no members go oldest first once quiet for a minute
+        # (a background transcription keeps touching its session)
+        for session in self._evictable(now, min(60, self.idle_ttl), keep):
+            if not over(): break
+            self._evict(session, "pressure")
+
+    def _evict(self, session, reason):
+        del self.sessions[session.id]
+        self.evictions += 1
+        print(f"[Sessions] Evicted {session.id} ({reason})")
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            with self.lock:
+                self._enforce_limits()
+
+    def snapshot(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+            return {
+                "sessions": len(sessions),
+                "evictions": self.evictions,
+                "restores": self.restores,
+                "memory_estimate_mb": round(sum(s.memory_estimate() for s in sessions) / 1024 / 1024, 2),
+                "max_sessions": self.max_sessions,
+                "max_memory_mb": self.max_memory // 1024 // 1024,
+                "rooms": [s.summary() for s in sessions[-50:]],
+            }
+
+    def comment_snapshot(self):
+        """Comment pipeline counters summed over live sessions."""
+        with self.lock: sessions = list(self.sessions.values())
+        totals = Counter()
+        for s in sessions: totals.update(s.comments.snapshot())
+        return dict(totals)
@@ -0,0 +1,178 @@
+import re
+import math
+import threading
+
+# --- TRANSCRIPT RETRIEVAL INDEX ---
+# Incremental BM25 index over the streamed transcript. Passages are cut at the
+# [MM:SS] markers Gemini emits, so each retrieved passage carries its own
+# timestamp and the extraction prompt can still cite "(Source: [MM:SS])".
+
+TIMESTAMP_RE = re.compile(r"\[(?:\d{1,2}:)?\d{1,2}:\d{2}\]")
+TOKEN_RE = re.compile(r"[^\W_]+")  # Letters and digits in any script
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can did do does for from had has have he her his how i if in
+is it its just me my of on or our she so that the their them then there they this to was
+we were what when where which who why will with you your
+""".split())
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 chars per token) used for prompt budgeting."""
+    return len(text) // 4 + 1
+
+
+def _stem(word):
+    if not word.isascii(): return word  # The suffix list is English-only
+    for suffix in ("ing", "ed", "es", "s", "e"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def tokenize(text):
+    """Lowercase, split on Unicode words, drop stopwords and stem English words."""
+    return [_stem(t) for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class TranscriptIndex:
+    """Append-only passage index scored with BM25."""
+    def __init__(self, max_passage_chars=1200, k1=1.5, b=0.75):
+        self.max_passage_chars = max_passage_chars
+        self.k1 = k1
+        self.b = b
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.passages = []   # [{ 'timestamp', 'text', 'length' }]
+            self.postings = {}   # { term: { passage_id: tf } }
+            self.lengths = []
+            self.total_length = 0
+            self.buffer = ""     # Text of the open (still growing) passage
+            self.open_id = None
+            self.revision = 0
+
+    def __len__(self):
+        return len(self.passages)
+
+    # --- WRITE PATH ---
+    def append(self, text):
+        """Feed a streamed chunk. Closed passages are indexed once; only the open tail is re-indexed."""
+        if not text: return
+        with self.lock:
+            self.buffer += text
+            self._drop_open()
+
+            while True:
+                markers = [m.start() for m in TIMESTAMP_RE.finditer(self.buffer) if m.start() > 0]
+                if markers:
+                    cut = markers[0]
+                elif len(self.buffer) > self.max_passage_chars:
+                    cut = self._soft_cut(self.buffer)
+                else:
+                    break
+                self._add(self.buffer[:cut])
+                remainder = self.buffer[cut:]
+                # Oversized passages keep their timestamp so the continuation stays citable.
+                if not TIMESTAMP_RE.match(remainder):
+                    stamp = TIMESTAMP_RE.match(self.buffer)
+                    if stamp: remainder = stamp.group(0) + " " + remainder.lstrip()
+                self.buffer = remainder
+
+            if self.buffer.strip():
+                self.open_id = self._add(self.buffer)
+            self.revision += 1
+
+    def _soft_cut(self, text):
+        limit = self.max_passage_chars
+        for sep in ("\n", ". ", " "):
+            pos = text.rfind(sep, limit // 2, limit)
+            if pos != -1: return pos + len(sep)
+        return limit
+
+    def _add(self, text):
+        text = text.strip()
+        if not text: return None
+        stamp = TIMESTAMP_RE.match(text)
+        terms = tokenize(text)
+        pid = len(self.passages)
+        self.passages.append({'timestamp': stamp.group(0) if stamp else None, 'text': text, 'length': len(terms)})
+        self.lengths.append(len(terms))
+        self.total_length += len(terms)
+        counts = {}
+        for t in terms: counts[t] = counts.get(t, 0) + 1
+        for t, tf in counts.items():
+            self.postings.setdefault(t, {})[pid] = tf
+        return pid
+
+    def _drop_open(self):
+        """Remove the open tail passage so it can be re-indexed with its new text."""
+        if self.open_id is None: return
+        pid = self.open_id
+        self.open_id = None
+        for t in set(tokenize(self.passages[pid]['text'])):
+            bucket = self.postings.get(t)
+            if bucket is None: continue
+            bucket.pop(pid, None)
+            if not bucket: del self.postings[t]
+        self.total_length -= self.lengths[pid]
+        self.passages.pop()
+        self.lengths.pop()
+
+    # --- READ PATH ---
+    def search(self, query, top_k=8):
+        """Return [(passage_id, score)] for the best BM25 matches, highest first."""
+        import numpy as np  # Deferred: keeps NumPy off the server's startup path
+        with self.lock:
+            n = len(self.passages)
+            terms = set(tokenize(query))
+            if not n or not terms: return []
+            lengths = np.asarray(self.lengths, dtype=np.float64)
+            avgdl = max(self.total_length / n, 1.0)
+            norm = self.k1 * (1 - self.b + self.b * lengths / avgdl)
+            scores = np.zeros(n)
+            for t in terms:
+                bucket = self.postings.get(t)
+                if not bucket: continue
+                ids = np.fromiter(bucket.keys(), dtype=np.int64, count=len(bucket))
+                tf = np.fromiter(bucket.values(), dtype=np.float64, count=len(bucket))
+                idf = math.log(1 + (n - len(bucket) + 0.5) / (len(bucket) + 0.5))
+                scores[ids] += idf * tf * (self.k1 + 1) / (tf + norm[ids])
+
+        hits = np.flatnonzero(scores)
+        if not hits.size: return []
+        k = min(top_k, hits.size)
+        best = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(int(i), float(scores[i])) for i in best]
+
+    def known_terms(self, terms):
+        """How many of the given (already tokenized) terms occur anywhere in the transcript."""
+        with self.lock:
+            return sum(1 for t in set(terms) if t in self.postings)
+
+    def build_context(self, query, max_tokens=2000, top_k=8):
+        """Top-k passages that fit the token budget, in transcript order.
+
+        Falls back to the most recent passages when nothing matches lexically, so
+        questions like "what did they just say?" still get context.
+        """
+        hits = self.search(query, top_k=top_k)
+        with self.lock:
+            if hits:
+                candidates = [pid for pid, _ in hits]
+            else:
+                candidates = list(range(len(self.passages) - 1, -1, -1))
+
+            chosen, used = [], 0
+            for pid in candidates:
+                if pid >= len(self.passages): continue  # Index was reset mid-query
+                cost = estimate_tokens(self.passages[pid]['text'])
+                if used + cost > max_tokens:
+                    if hits: continue
+                    break
+                chosen.append(pid)
+                used += cost
+            return "\n...\n".join(self.passages[pid]['text'] for pid in sorted(chosen))
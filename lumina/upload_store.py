@@ -0,0 +1,130 @@
+import os
+import json
+import uuid
+import hashlib
+import threading
+
+# --- CHUNKED UPLOADS & CONTENT-ADDRESSED TRANSCRIPTS ---
+# Uploads arrive as ordered chunks and are hashed while they stream to disk, so
+# the SHA-256 is known the moment the last byte lands. A finished transcript is
+# stored under that hash; uploading the same media again replays it instead of
+# paying for another Gemini upload + transcription.
+
+CHUNK_READ_SIZE = 1024 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def save_stream(stream, path):
+    """Copy a file-like stream to disk in chunks, returning its SHA-256."""
+    digest = hashlib.sha256()
+    with open(path, "wb") as out:
+        while True:
+            block = stream.read(CHUNK_READ_SIZE)
+            if not block: break
+            digest.update(block)
+            out.write(block)
+    return digest.hexdigest()
+
+
+class UploadStore:
+    def __init__(self, folder):
+        self.folder = os.path.join(folder, "partial")
+        os.makedirs(self.folder, exist_ok=True)
+        self.hashers = {}  # { upload_id: running sha256 } (rebuilt from disk after a restart)
+        self.lock = threading.Lock()
+
+    def _paths(self, upload_id):
+        if not upload_id.isalnum(): raise UploadError("Invalid upload id", 404)
+        base = os.path.join(self.folder, upload_id)
+        return base + ".part", base + ".json"
+
+    def _meta(self, upload_id):
+        data_path, meta_path = self._paths(upload_id)
+        if not os.path.exists(meta_path): raise UploadError("Unknown upload", 404)
+        with open(meta_path) as f: return json.load(f)
+
+    def create(self, filename, size):
+        upload_id = uuid.uuid4().hex
+        data_path, meta_path = self._paths(upload_id)
+        with open(meta_path, "w") as f: json.dump({"filename": filename, "size": int(size)}, f)
+        open(data_path, "wb").close()
+        self.hashers[upload_id] = hashlib.sha256()
+        return upload_id
+
+    def status(self, upload_id):
+        meta = self._meta(upload_id)
+        data_path, _ = self._paths(upload_id)
+        return dict(meta, upload_id=upload_id, offset=os.path.getsize(data_path))
+
+    def _hasher(self, upload_id, data_path):
+        hasher = self.hashers.get(upload_id)
+        if hasher is None:
+            # Resumed after a restart: re-hash what already made it to disk
+            hasher = hashlib.sha256()
+            with open(data_path, "rb") as f:
+                for block in iter(lambda: f.read(CHUNK_READ_SIZE), b""): hasher.update(block)
+            self.hashers[upload_id] = hasher
+        return hasher
+
+    def write_chunk(self, upload_id, offset, stream):
+        """Append a chunk at `offset`. A mismatched offset returns 409 so the client can resume."""
+        meta = self._meta(upload_id)
+        data_path, _ = self._paths(upload_id)
+        with self.lock:
+            current = os.path.getsize(data_path)
+            if offset != current: raise UploadError(f"Expected offset {current}", 409)
+            hasher = self._hasher(upload_id, data_path)
+            with open(data_path, "ab") as out:
+                while True:
+                    block = stream.read(CHUNK_READ_SIZE)
+                    if not block: break
+                    if current + len(block) > meta["size"]:
+                        out.truncate(current)
+                        self.hashers.pop(upload_id, None)
+                        raise UploadError("Chunk exceeds declared size")
+                    hasher.update(block)
+                    out.write(block)
+                    current += len(block)
+            return current
+
+    def complete(self, upload_id, dest_folder, safe_name):
+        """Move the finished upload into place. Returns (path, sha256)."""
+        meta = self._meta(upload_id)
+        data_path, meta_path = self._paths(upload_id)
+        with self.lock:
+            size = os.path.getsize(data_path)
+            if size != meta["size"]: raise UploadError(f"Incomplete upload ({size}/{meta['size']} bytes)", 409)
+            digest = self._hasher(upload_id, data_path).hexdigest()
+            self.hashers.pop(upload_id, None)
+            path = os.path.join(dest_folder, safe_name)
+            os.replace(data_path, path)
+            os.remove(meta_path)
+        return path, digest
+
+
+class TranscriptStore:
+    """Finished transcripts keyed by the SHA-256 of the source media."""
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def _path(self, content_hash):
+        return os.path.join(self.folder, content_hash + ".txt")
+
+    def get(self, content_hash):
+        if not content_hash: return None
+        try:
+            with open(self._path(content_hash), encoding="utf-8") as f: return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, content_hash, text):
+        if not content_hash or not text: return
+        tmp = self._path(content_hash) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f: f.write(text)
+        os.replace(tmp, self._path(content_hash))
@@ -0,0 +1,149 @@
+import time
+import threading
+from collections import deque, Counter
+from contextlib import contextmanager
+
+# --- MODEL WORK SCHEDULER ---
+# Every text model call takes one of `slots` here before it goes out. Waiting
+# calls are granted in priority-class order; inside a class the user with the
+# fewest calls running goes first, then arrival order, so one viewer flooding
+# the chat cannot queue everyone else out. Background classes together never
+# hold more than `background_slots`, which keeps slots free for interactive
+# work during a re-check storm. Re-check calls are dropped once stale (the
+# transcript moved on, a newer pass will cover them) or past their deadline,
+# and insights calls run at most one at a time per session. Background calls
+# gain one priority level per `aging` seconds waited (never above the highest
+# background class), so a steady re-check load cannot starve insights.
+
+CLASSES = {
+    # name: priority (lower first), deadline in seconds (None = none), late work dropped, background
+    "interactive": {"priority": 0, "deadline": 10, "drop": False, "background": False},
+    "active": {"priority": 1, "deadline": 20, "drop": False, "background": False},
+    "recheck": {"priority": 2, "deadline": 30, "drop": True, "background": True},
+    "insights": {"priority": 3, "deadline": None, "drop": False, "background": True},
+}
+
+
+class WorkDropped(Exception):
+    pass
+
+
+class Job:
+    """One unit of work (a question, a re-check batch, a report) that may make several model calls."""
+    def __init__(self, cls, user=None, session=None, stale=None, exclusive=False):
+        if cls not in CLASSES: raise ValueError(f"Unknown work class {cls!r}")
+        self.cls = cls
+        self.user = user
+        self.session = session
+        self.stale = stale          # Callable: True once the result would be thrown away
+        self.exclusive = exclusive  # At most one call per session for this class at a time
+        self.created = time.monotonic()
+        self.dropped = False
+
+    def expired(self, now):
+        deadline = CLASSES[self.cls]["deadline"]
+        return deadline is not None and now - self.created > deadline
+
+
+class _Ticket:
+    __slots__ = ("job", "seq", "enqueued")
+
+    def __init__(self, job, seq):
+        self.job, self.seq, self.enqueued = job, seq, time.monotonic()
+
+
+class WorkScheduler:
+    def __init__(self, slots=16, background_slots=None, aging=10.0):
+        self.slots = slots
+        self.background_slots = background_slots or max(1, slots // 4)
+        self.aging = aging
+        self.background_top = min(spec["priority"] for spec in CLASSES.values() if spec["background"])
+        self.cond = threading.Condition()
+        self.waiting = []
+        self.seq = 0
+        self.running = Counter()        # { class: calls holding a slot }
+        self.running_users = Counter()  # { (class, user): calls holding a slot }
+        self.busy_sessions = set()      # { (class, session) } for exclusive jobs
+        self.stats = {cls: {"submitted": 0, "completed": 0, "dropped": 0, "deadline_missed": 0,
+                            "waits": deque(maxlen=2048)} for cls in CLASSES}
+
+    def job(self, cls, user=None, session=None, stale=None, exclusive=False):
+        return Job(cls, user=user, session=session, stale=stale, exclusive=exclusive)
+
+    @contextmanager
+    def slot(self, job=None):
+        """Hold a slot for one model call. Raises WorkDropped if the job is shed while waiting."""
+        job = job or Job("interactive")
+        self._enter(job)
+        try:
+            yield
+        finally:
+            self._exit(job)
+
+    def _enter(self, job):
+        spec = CLASSES[job.cls]
+        stats = self.stats[job.cls]
+        with self.cond:
+            stats["submitted"] += 1
+            self.seq += 1
+            ticket = _Ticket(job, self.seq)
+            self.waiting.append(ticket)
+            while True:
+                now = time.monotonic()
+                if spec["drop"] and (job.expired(now) or (job.stale and job.stale())):
+                    self.waiting.remove(ticket)
+                    stats["dropped"] += 1
+                    job.dropped = True
+                    self.cond.notify_all()
+                    raise WorkDropped(f"{job.cls} work dropped")
+                if self._next() is ticket: break
+                # Wake up now and then to notice deadlines and staleness
+                self.cond.wait(timeout=1.0)
+            self.waiting.remove(ticket)
+            self.running[job.cls] += 1
+            self.running_users[(job.cls, job.user)] += 1
+            if job.exclusive: self.busy_sessions.add((job.cls, job.session))
+            stats["waits"].append(now - ticket.enqueued)
+            if job.expired(now): stats["deadline_missed"] += 1
+            self.cond.notify_all()  # Another waiter may fit in a slot that is still free
+
+    def _exit(self, job):
+        with self.cond:
+            self.running[job.cls] -= 1
+            self.running_users[(job.cls, job.user)] -= 1
+            if job.exclusive: self.busy_sessions.discard((job.cls, job.session))
+            self.stats[job.cls]["completed"] += 1
+            self.cond.notify_all()
+
+    def _next(self):
+        """The waiting ticket to grant next, or None if nothing may start now."""
+        if sum(self.running.values()) >= self.slots: return None
+        now = time.monotonic()
+        background_free = sum(n for cls, n in self.running.items() if CLASSES[cls]["background"]) < self.background_slots
+        best, best_rank = None, None
+        for ticket in self.waiting:
+            job = ticket.job
+            spec = CLASSES[job.cls]
+            priority = spec["priority"]
+            if spec["background"]:
+                if not background_free: continue
+                priority = max(self.background_top, priority - int((now - ticket.enqueued) / self.aging))
+            if job.exclusive and (job.cls, job.session) in self.busy_sessions: continue
+            rank = (priority, self.running_users[(job.cls, job.user)], ticket.seq)
+            if best_rank is None or rank < best_rank: best, best_rank = ticket, rank
+        return best
+
+    def snapshot(self):
+        with self.cond:
+            depth = Counter(t.job.cls for t in self.waiting)
+            result = {"slots": self.slots, "background_slots": self.background_slots, "classes": {}}
+            for cls, stats in self.stats.items():
+                waits = sorted(stats["waits"])
+                pick = lambda p: round(1000 * waits[min(int(p * len(waits)), len(waits) - 1)], 1) if waits else 0.0
+                result["classes"][cls] = {
+                    "queued": depth[cls], "running": self.running[cls],
+                    "submitted": stats["submitted"], "completed": stats["completed"],
+                    "dropped": stats["dropped"], "deadline_missed": stats["deadline_missed"],
+                    "wait_ms_p50": pick(0.5), "wait_ms_p99": pick(0.99),
+                }
+        return result